@@ -0,0 +1,81 @@
+"""
+pytest plugin running the collected tests for several rounds in one process.
+
+Loaded by run_py_rounds.py in ``--in-process`` mode (``-p
+pytest_inprocess_rounds``, with this directory on ``PYTHONPATH``). When
+``PYTEST_INPROCESS_ROUNDS`` is set to N, the test loop runs the
+collected items N times: interpreter startup, imports, conftest loading
+and collection are paid once. Each round's outcomes go to
+``$PYTEST_OUTCOMES_DIR/run_<round>.jsonl`` (format of ``pytest_outcomes``).
+
+Between rounds every fixture is torn down, session-scoped ones included,
+and per-item state is reset, so each round starts from fresh fixtures.
+Module-level state is *not* reset: a test that only fails after earlier
+rounds ran in the same interpreter points to state leaking between tests,
+which is why these rounds are labelled apart from process-per-round ones.
+
+Not compatible with pytest-xdist, which replaces the test loop.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from pytest_outcomes import OutcomeRecorder
+
+ROUNDS_ENV = 'PYTEST_INPROCESS_ROUNDS'
+OUTCOMES_DIR_ENV = 'PYTEST_OUTCOMES_DIR'
+
+
+def _rounds() -> int:
+    return int(os.environ.get(ROUNDS_ENV) or 0)
+
+
+def pytest_configure(config) -> None:
+    if _rounds() and (config.getoption('numprocesses', None) or hasattr(config, 'workerinput')):
+        raise pytest.UsageError(f"{ROUNDS_ENV} cannot be combined with pytest-xdist (-n)")
+
+
+def _reset_items(items) -> None:
+    """Drop the output captured on the items in the previous round (pytest resets their fixture requests)."""
+    for item in items:
+        item._report_sections = []
+
+
+def _run_round(session) -> None:
+    """One pass over the collected items, as pytest's own test loop does it."""
+    items = session.items
+    for i, item in enumerate(items):
+        # nextitem=None after the last item tears down every fixture, session scope included
+        nextitem = items[i + 1] if i + 1 < len(items) else None
+        item.config.hook.pytest_runtest_protocol(item=item, nextitem=nextitem)
+        if session.shouldfail:
+            raise session.Failed(session.shouldfail)
+        if session.shouldstop:
+            raise session.Interrupted(session.shouldstop)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtestloop(session):
+    rounds = _rounds()
+    if not rounds or session.config.option.collectonly:
+        return None
+    if session.testsfailed and not session.config.option.continue_on_collection_errors:
+        raise session.Interrupted(f"{session.testsfailed} error(s) during collection")
+
+    outdir = Path(os.environ.get(OUTCOMES_DIR_ENV, '.'))
+    reporter = session.config.pluginmanager.get_plugin('terminalreporter')
+    for run in range(1, rounds + 1):
+        if run > 1:
+            _reset_items(session.items)
+        recorder = OutcomeRecorder(str(outdir / f'run_{run}.jsonl'))
+        session.config.pluginmanager.register(recorder, f'outcome_recorder_round{run}')
+        try:
+            _run_round(session)
+        finally:
+            session.config.pluginmanager.unregister(recorder)
+            recorder.close()
+        if reporter is not None:
+            reporter.write_line(f"In-process round {run}/{rounds} complete")
+    return True
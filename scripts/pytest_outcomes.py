@@ -0,0 +1,59 @@
+"""
+pytest plugin recording the outcome of every test phase as JSON lines.
+
+Loaded into each round by run_py_rounds.py (``-p pytest_outcomes``, with
+this directory on ``PYTHONPATH``). When ``PYTEST_OUTCOMES_FILE`` is set,
+every setup/call/teardown report becomes one line of that file:
+
+    {"nodeid": "tests/test_x.py::test_y", "when": "call", "outcome": "failed",
+     "duration": 0.0123, "worker": "main"}
+
+``worker`` is the pytest-xdist worker id (``gw0``, ``gw1``, ...) or ``main``.
+Unlike the ``FAILED`` lines of the console output, the file lists the tests
+that passed too, so the analyzer knows how many rounds each test ran.
+
+Only the standard library is used: this runs under the project's venv.
+"""
+
+import json
+import os
+
+OUTCOMES_FILE_ENV = 'PYTEST_OUTCOMES_FILE'
+
+
+class OutcomeRecorder:
+    """Writes one JSON line per test report."""
+
+    def __init__(self, path: str):
+        self._file = open(path, 'w', encoding='utf-8', buffering=1)
+
+    def pytest_runtest_logreport(self, report) -> None:
+        # Under xdist the controller receives every worker's reports; ``node`` is the worker
+        node = getattr(report, 'node', None)
+        worker = node.gateway.id if node is not None else os.environ.get('PYTEST_XDIST_WORKER', 'main')
+        self._file.write(json.dumps({
+            'nodeid': report.nodeid,
+            'when': report.when,
+            'outcome': report.outcome,
+            'duration': round(report.duration, 6),
+            'worker': worker
+        }) + '\n')
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def pytest_configure(config) -> None:
+    path = os.environ.get(OUTCOMES_FILE_ENV)
+    # xdist workers forward their reports to the controller, which writes them
+    if not path or hasattr(config, 'workerinput'):
+        return
+    config._outcome_recorder = OutcomeRecorder(path)
+    config.pluginmanager.register(config._outcome_recorder, 'outcome_recorder')
+
+
+def pytest_unconfigure(config) -> None:
+    recorder = getattr(config, '_outcome_recorder', None)
+    if recorder is not None:
+        config.pluginmanager.unregister(recorder)
+        recorder.close()
@@ -7,7 +7,14 @@ PROJECT_DIR="$1"   # e.g. ../flaky-tests-experiments/pandas
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 REPO_ROOT="$(dirname "$SCRIPT_DIR")"
 PROJECT_NAME=$(basename "$PROJECT_DIR")
-OUTDIR="$REPO_ROOT/results/$PROJECT_NAME/pytest-rerun/$(date +%F_%H-%M-%S)"
+# PYTHON_TEST_IN_PROCESS=1 runs every round in one pytest process; its results are
+# kept under their own tool name so they are never mixed with process-per-round runs.
+if [ "${PYTHON_TEST_IN_PROCESS:-0}" != "0" ]; then
+    TOOL="pytest-inprocess"; MODE="in-process"
+else
+    TOOL="pytest-rerun"; MODE="process-per-round"
+fi
+OUTDIR="$REPO_ROOT/results/$PROJECT_NAME/$TOOL/$(date +%F_%H-%M-%S)"
 mkdir -p "$OUTDIR"
 
 # Create isolated virtual environment for this project
@@ -116,29 +123,27 @@ fi
 echo "✅ Environment ready for $PROJECT_NAME"
 # We'll run the whole test-suite N times and capture per-test failures.
 ROUNDS=${2:-${PYTHON_TEST_ROUNDS:-50}}   # number of full test-suite runs (default 50, configurable via .env)
+PARALLEL=${PYTHON_TEST_PARALLEL:-1}     # rounds run at the same time (0 = one per core)
+DISCOVERY=${PYTHON_DISCOVERY_ROUNDS:-0} # full-suite rounds before rerunning only failures (0 = off)
 RESULT_CSV="$OUTDIR/runs.csv"
-echo "run,failed_tests_count,failed_tests_list" > "$RESULT_CSV"
-
-for i in $(seq 1 $ROUNDS); do
-  echo "=========================================="
-  echo "Run #$i/$ROUNDS ($(awk "BEGIN {printf \"%.1f\", ($i/$ROUNDS)*100}")% complete)"
-  echo "=========================================="
-  # Run pytest once, collect failing test nodeids (no reruns here — single run)
-  # Use -q to keep machine-friendly output; --maxfail=0 runs through all tests
-  TIMESTAMP=$(date +%s)
-  LOG="$OUTDIR/run_${i}.log"
-  pytest -q --maxfail=0 2>&1 | tee "$LOG" || true
-
-  # extract failed test ids from junit or pytest output (simple parse below)
-  FAILS=$(grep -Po '(?<=FAILED\s)([^ ]+::[^ ]+)' "$LOG" 2>/dev/null | tr '\n' ';' | sed 's/;$//' || echo "")
-  # Fallback: count 'failed' line in summary:
-  FAIL_COUNT=$(grep -Eo '[0-9]+ failed' "$LOG" 2>/dev/null | grep -Po '^\d+' || echo 0)
-
-  echo "${i},${FAIL_COUNT},\"${FAILS}\"" >> "$RESULT_CSV"
-  echo "Run $i complete. Failed tests: $FAIL_COUNT"
-done
 
-echo "{\"project\":\"$(basename "$PROJECT_DIR")\",\"date\":\"$(date --iso-8601=seconds)\",\"rounds\":$ROUNDS}" > "$OUTDIR/metadata.json"
+# Each round is its own pytest process (private temp/cache dirs); runs.csv is
+# written atomically by the orchestrator as rounds finish.
+# With PYTHON_TEST_SEQUENTIAL=1 it stops early once the SPRT has settled every test.
+# With PYTHON_DISCOVERY_ROUNDS=D only D rounds run the full suite; the rest rerun
+# the tests that failed (confirm_runs.csv).
+python "$SCRIPT_DIR/run_py_rounds.py" --outdir "$OUTDIR" --rounds "$ROUNDS" --parallel "$PARALLEL" \
+    --discovery-rounds "$DISCOVERY"
+
+# Rounds actually run (fewer than requested when the sequential mode stopped early)
+MAX_ROUNDS=$ROUNDS
+ROUNDS=$(( $(wc -l < "$RESULT_CSV") - 1 ))
+PHASES=""
+if [ -f "$OUTDIR/confirm_runs.csv" ]; then
+    PHASES=",\"confirmation_rounds\":$(( $(wc -l < "$OUTDIR/confirm_runs.csv") - 1 ))"
+fi
+
+echo "{\"project\":\"$(basename "$PROJECT_DIR")\",\"date\":\"$(date --iso-8601=seconds)\",\"rounds\":$ROUNDS,\"max_rounds\":$MAX_ROUNDS,\"parallel\":$PARALLEL,\"mode\":\"$MODE\"$PHASES}" > "$OUTDIR/metadata.json"
 
 popd >/dev/null
 echo "=========================================="
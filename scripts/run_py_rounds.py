@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Run the rounds of a pytest flaky-test detection campaign, several at a time.
+
+Called by run_py_flaky_detection.sh from inside the project directory (with
+the project's venv active). Every round is an independent ``pytest -q
+--maxfail=0`` process with its own temporary directory, pytest cache
+directory and ``PYTEST_ADDOPTS``, so up to ``--parallel`` rounds can run
+concurrently without sharing state through ``/tmp`` or ``.pytest_cache``.
+
+Each round's console output goes to ``run_N.log`` and is echoed to the
+console line by line, prefixed with the round (``[Run 3] ...``) so that
+concurrent rounds stay readable; the outcome of every test phase, written
+by the ``pytest_outcomes`` plugin, goes to ``run_N.jsonl``. ``runs.csv``
+keeps the schema the analyzer reads
+(``run,failed_tests_count,failed_tests_list``) and is rewritten atomically,
+in round order, as rounds finish; its failures come from the JSONL file
+(the log's ``FAILED`` lines are only a fallback).
+
+With ``--sequential`` the campaign stops as soon as a sequential probability
+ratio test (Wald's SPRT) has settled every test: see ``SequentialStop``.
+
+With ``--discovery-rounds D`` the campaign has two phases: D full-suite
+rounds (``run_N.log``/``runs.csv``), then the remaining rounds rerun only
+the nodeids that failed during discovery (listed in ``confirm_nodeids.txt``)
+and are recorded separately in ``confirm_N.log``/``confirm_N.jsonl``/
+``confirm_runs.csv``, with the same schemas.
+
+With ``--in-process`` all rounds run inside one pytest process (plugin
+``pytest_inprocess_rounds``): startup, imports and collection are paid
+once, fixtures are torn down between rounds, and the console output goes
+to a single ``pytest.log`` (and to the console). ``run_N.jsonl`` and
+``runs.csv`` keep the same format; run_py_flaky_detection.sh stores these
+runs under the ``pytest-inprocess`` tool so they are never mixed with
+process-per-round results (a test flaky only in-process points to state
+leaking between rounds).
+
+Only the standard library is used: this runs under the project's venv.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+# Nodeids of failed tests in pytest's short summary ("FAILED tests/test_x.py::test_y - ...")
+FAILED_PATTERN = re.compile(r'FAILED\s([^ \n]+::[^ \n]+)')
+# Failure count of the final summary line ("2 failed, 1017 passed in 125.07s")
+FAIL_COUNT_PATTERN = re.compile(r'(\d+) failed')
+
+RUNS_CSV_HEADER = 'run,failed_tests_count,failed_tests_list\n'
+
+# Plugin writing each round's per-test outcomes (scripts/pytest_outcomes.py)
+OUTCOMES_PLUGIN = 'pytest_outcomes'
+OUTCOMES_FILE_ENV = 'PYTEST_OUTCOMES_FILE'
+PLUGIN_DIR = Path(__file__).resolve().parent
+
+# Plugin repeating the test loop in one process (scripts/pytest_inprocess_rounds.py)
+IN_PROCESS_PLUGIN = 'pytest_inprocess_rounds'
+IN_PROCESS_ROUNDS_ENV = 'PYTEST_INPROCESS_ROUNDS'
+OUTCOMES_DIR_ENV = 'PYTEST_OUTCOMES_DIR'
+IN_PROCESS_LOG = 'pytest.log'
+
+# Bytes of a round's output read at a time while copying it to the log and console
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Phase -> (log prefix, results CSV, label printed per round)
+PHASES = {
+    'run': ('run', 'runs.csv', 'Run'),
+    'confirm': ('confirm', 'confirm_runs.csv', 'Confirm')
+}
+CONFIRM_NODEIDS_FILE = 'confirm_nodeids.txt'
+
+# Same default as FlakinessMetrics.SIGNIFICANCE_LEVEL (visualization/metrics.py)
+DEFAULT_SIGNIFICANCE_LEVEL = 0.05
+# Smallest failure (or pass) rate the sequential mode must not miss: the 10%
+# the fixed 20-round campaign is sized for (a clean suite then needs 28 rounds)
+DEFAULT_MIN_FAILURE_RATE = 0.1
+
+
+@dataclass
+class RoundResult:
+    """Outcome of one pytest round."""
+    run: int
+    failed_tests: List[str] = field(default_factory=list)
+    failed_count: int = 0
+    returncode: Optional[int] = None
+
+    def csv_row(self) -> str:
+        return f'{self.run},{self.failed_count},"{";".join(self.failed_tests)}"\n'
+
+
+def parse_round_log(log_file: Path) -> RoundResult:
+    """Failed nodeids and failure count of a ``run_N.log``."""
+    text = log_file.read_text(encoding='utf-8', errors='replace')
+    counts = FAIL_COUNT_PATTERN.findall(text)
+    return RoundResult(
+        run=0,
+        failed_tests=list(dict.fromkeys(FAILED_PATTERN.findall(text))),
+        failed_count=int(counts[-1]) if counts else 0
+    )
+
+
+def parse_round_outcomes(outcomes_file: Path) -> RoundResult:
+    """Failed nodeids and failure count of a ``run_N.jsonl`` written by the outcomes plugin."""
+    failed = {}
+    with open(outcomes_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            report = json.loads(line)
+            # Same tests as pytest's FAILED lines: failures of the test call itself
+            if report['when'] == 'call' and report['outcome'] == 'failed':
+                failed[report['nodeid']] = None
+    return RoundResult(run=0, failed_tests=list(failed), failed_count=len(failed))
+
+
+class SequentialStop:
+    """
+    Wald's SPRT applied to every test after each round.
+
+    For each test, H0 "deterministic" (always passes, or always fails) is
+    tested against H1 "flaky with failure (or pass) rate >= min_rate":
+
+    - a test that both failed and passed is conclusively flaky (its
+      likelihood under H0 is zero);
+    - a test with the same outcome in all n rounds has log-likelihood ratio
+      n * log(1 - min_rate), and is accepted as deterministic once that
+      reaches log(beta / (1 - alpha)).
+
+    Tests that never failed are all in the second case, so a clean suite
+    stops after ``rounds_needed`` rounds instead of the full campaign.
+    """
+
+    def __init__(self, significance_level: float = DEFAULT_SIGNIFICANCE_LEVEL,
+                 min_rate: float = DEFAULT_MIN_FAILURE_RATE, beta: Optional[float] = None):
+        alpha = significance_level
+        beta = alpha if beta is None else beta
+        self.accept_h0 = math.log(beta / (1 - alpha))
+        self.step = math.log(1 - min_rate)
+
+    @property
+    def rounds_needed(self) -> int:
+        """Identical outcomes after which a test is accepted as deterministic."""
+        return math.ceil(self.accept_h0 / self.step)
+
+    def classify(self, failures: int, runs: int) -> str:
+        """'flaky', 'deterministic' or 'undecided' for a test with ``failures`` out of ``runs``."""
+        if 0 < failures < runs:
+            return 'flaky'
+        if runs * self.step <= self.accept_h0:
+            return 'deterministic'
+        return 'undecided'
+
+    def decide(self, results: List['RoundResult']):
+        """Per-class counts of the tests that failed so far, and whether every test is settled."""
+        runs = len(results)
+        failures = {}
+        for result in results:
+            for test in result.failed_tests:
+                failures[test] = failures.get(test, 0) + 1
+
+        counts = {'flaky': 0, 'deterministic': 0, 'undecided': 0}
+        for test_failures in failures.values():
+            counts[self.classify(test_failures, runs)] += 1
+        # Tests that never failed are settled together
+        never_failed = self.classify(0, runs)
+        return counts, counts['undecided'] == 0 and never_failed != 'undecided'
+
+
+def round_environment(round_dir: Path, outcomes_file: Optional[Path] = None) -> dict:
+    """Environment of a round: private temp dir, cache dir and basetemp, plugins and the outcomes file."""
+    env = dict(os.environ)
+    for name in ('TMPDIR', 'TEMP', 'TMP'):
+        env[name] = str(round_dir)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(PLUGIN_DIR), env.get('PYTHONPATH')]))
+    if outcomes_file is not None:
+        env[OUTCOMES_FILE_ENV] = str(outcomes_file)
+    addopts = env.get('PYTEST_ADDOPTS', '')
+    env['PYTEST_ADDOPTS'] = ' '.join(filter(None, [
+        addopts,
+        f'-o cache_dir={round_dir / "pytest_cache"}',
+        f'--basetemp={round_dir / "basetemp"}'
+    ]))
+    return env
+
+
+def write_runs_csv(csv_path: Path, results: List[RoundResult]) -> None:
+    """Write runs.csv (rows in round order) through a temporary file and an atomic rename."""
+    tmp_path = csv_path.with_name(csv_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(RUNS_CSV_HEADER)
+        for result in sorted(results, key=lambda r: r.run):
+            f.write(result.csv_row())
+    os.replace(tmp_path, csv_path)
+
+
+def echo_lines(lines: List[bytes], prefix: bytes) -> None:
+    """Write complete output lines to the console, each behind ``prefix``."""
+    sys.stdout.buffer.write(b''.join(prefix + line + b'\n' for line in lines))
+    sys.stdout.buffer.flush()
+
+
+async def tee_output(stream: asyncio.StreamReader, log, prefix: bytes) -> None:
+    """Copy a round's output to its log as is and to the console one whole line at a time."""
+    pending = b''
+    while True:
+        chunk = await stream.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            break
+        log.write(chunk)
+        # Only whole lines reach the console, so concurrent rounds never split each other's lines
+        *lines, pending = (pending + chunk).split(b'\n')
+        echo_lines(lines, prefix)
+    if pending:
+        echo_lines([pending], prefix)
+
+
+async def run_round(run: int, rounds: int, outdir: Path, pytest_cmd: List[str],
+                    semaphore: asyncio.Semaphore, stop: asyncio.Event,
+                    phase: str = 'run') -> Optional[RoundResult]:
+    """Run one pytest round once a slot is free and parse its outcomes (None if stopped before starting)."""
+    log_prefix, _, label = PHASES[phase]
+    async with semaphore:
+        if stop.is_set():
+            return None
+        print(f"{label} #{run}/{rounds} started", flush=True)
+        log_file = outdir / f'{log_prefix}_{run}.log'
+        outcomes_file = outdir / f'{log_prefix}_{run}.jsonl'
+        with tempfile.TemporaryDirectory(prefix=f'pytest-{log_prefix}{run}-') as round_dir, \
+                open(log_file, 'wb') as log:
+            process = await asyncio.create_subprocess_exec(
+                *pytest_cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+                env=round_environment(Path(round_dir), outcomes_file)
+            )
+            await tee_output(process.stdout, log, f'[{label} {run}] '.encode())
+            returncode = await process.wait()
+
+    # No outcomes file if pytest failed before loading plugins: fall back to the log
+    result = parse_round_outcomes(outcomes_file) if outcomes_file.exists() else parse_round_log(log_file)
+    result.run = run
+    result.returncode = returncode
+    return result
+
+
+async def run_rounds(rounds: int, parallel: int, outdir: Path, pytest_cmd: List[str],
+                     sequential: Optional[SequentialStop] = None, phase: str = 'run') -> List[RoundResult]:
+    """
+    Run up to ``rounds`` rounds, at most ``parallel`` at a time, updating the
+    phase's CSV (runs.csv for full-suite rounds) as they finish.
+
+    With ``sequential``, no new round starts once every test is settled;
+    rounds already running are finished and recorded.
+    """
+    semaphore = asyncio.Semaphore(parallel)
+    stop = asyncio.Event()
+    _, csv_name, label = PHASES[phase]
+    csv_path = outdir / csv_name
+    write_runs_csv(csv_path, [])
+
+    results = []
+    tasks = [asyncio.ensure_future(run_round(run, rounds, outdir, pytest_cmd, semaphore, stop, phase))
+             for run in range(1, rounds + 1)]
+    for finished in asyncio.as_completed(tasks):
+        result = await finished
+        if result is None:
+            continue
+        results.append(result)
+        write_runs_csv(csv_path, results)
+        print(f"{label} {result.run} complete. Failed tests: {result.failed_count} "
+              f"({len(results)}/{rounds} done)", flush=True)
+
+        if sequential is not None and not stop.is_set():
+            counts, settled = sequential.decide(results)
+            print(f"SPRT: {counts['flaky']} flaky, {counts['deterministic']} deterministic, "
+                  f"{counts['undecided']} undecided", flush=True)
+            if settled:
+                print(f"SPRT: all tests settled after {len(results)} rounds, stopping early", flush=True)
+                stop.set()
+    return results
+
+
+async def run_two_phases(discovery_rounds: int, confirm_rounds: int, parallel: int, outdir: Path,
+                         pytest_cmd: List[str], sequential: Optional[SequentialStop] = None) -> None:
+    """Full-suite discovery rounds, then confirmation rounds of the nodeids that failed."""
+    print(f"Discovery: {discovery_rounds} full-suite rounds, {parallel} at a time", flush=True)
+    discovered = await run_rounds(discovery_rounds, parallel, outdir, pytest_cmd)
+
+    failed = sorted({test for result in discovered for test in result.failed_tests})
+    (outdir / CONFIRM_NODEIDS_FILE).write_text(''.join(f'{test}\n' for test in failed), encoding='utf-8')
+    if not failed:
+        print("Discovery found no failing tests; skipping confirmation rounds", flush=True)
+        return
+
+    print(f"Confirmation: up to {confirm_rounds} rounds of {len(failed)} failed test(s)", flush=True)
+    await run_rounds(confirm_rounds, parallel, outdir, pytest_cmd + failed, sequential, phase='confirm')
+
+
+def run_in_process(rounds: int, outdir: Path, pytest_cmd: List[str]) -> List[RoundResult]:
+    """Run every round inside one pytest process and write runs.csv from its per-round outcome files."""
+    print(f"Running {rounds} rounds in one pytest process (log: {IN_PROCESS_LOG})", flush=True)
+    with tempfile.TemporaryDirectory(prefix='pytest-inprocess-') as round_dir, \
+            open(outdir / IN_PROCESS_LOG, 'wb') as log:
+        env = round_environment(Path(round_dir))
+        env[IN_PROCESS_ROUNDS_ENV] = str(rounds)
+        env[OUTCOMES_DIR_ENV] = str(outdir)
+        with subprocess.Popen([*pytest_cmd, '-p', IN_PROCESS_PLUGIN], stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, env=env) as process:
+            for line in process.stdout:
+                log.write(line)
+                sys.stdout.buffer.write(line)
+                sys.stdout.buffer.flush()
+        returncode = process.returncode
+
+    results = []
+    for run in range(1, rounds + 1):
+        outcomes_file = outdir / f'run_{run}.jsonl'
+        if not outcomes_file.exists():
+            break
+        result = parse_round_outcomes(outcomes_file)
+        result.run = run
+        result.returncode = returncode
+        results.append(result)
+        print(f"Run {run} complete. Failed tests: {result.failed_count}", flush=True)
+
+    write_runs_csv(outdir / 'runs.csv', results)
+    if len(results) < rounds:
+        print(f"pytest exited with code {returncode} after {len(results)}/{rounds} rounds "
+              f"(see {IN_PROCESS_LOG})", flush=True)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description='Executa as rodadas do pytest (várias ao mesmo tempo) e grava runs.csv'
+    )
+    parser.add_argument('--outdir', required=True, type=Path,
+                        help='Diretório da execução (results/<projeto>/pytest-rerun/<timestamp>)')
+    parser.add_argument('--rounds', type=int, default=int(os.environ.get('PYTHON_TEST_ROUNDS', 50)),
+                        help='Número de rodadas (default: PYTHON_TEST_ROUNDS ou 50)')
+    parser.add_argument('--parallel', type=int, default=int(os.environ.get('PYTHON_TEST_PARALLEL', 1)),
+                        help='Rodadas simultâneas (default: PYTHON_TEST_PARALLEL ou 1; 0 = todos os núcleos)')
+    parser.add_argument('--sequential', action='store_true',
+                        default=os.environ.get('PYTHON_TEST_SEQUENTIAL', '') not in ('', '0'),
+                        help='Para cedo quando o SPRT decide todos os testes (default: PYTHON_TEST_SEQUENTIAL)')
+    parser.add_argument('--significance-level', type=float,
+                        default=float(os.environ.get('SIGNIFICANCE_LEVEL', DEFAULT_SIGNIFICANCE_LEVEL)),
+                        help='Nível de significância do SPRT (default: SIGNIFICANCE_LEVEL ou 0.05)')
+    parser.add_argument('--min-failure-rate', type=float,
+                        default=float(os.environ.get('PYTHON_SPRT_MIN_RATE', DEFAULT_MIN_FAILURE_RATE)),
+                        help='Menor taxa de falha que o SPRT deve detectar (default: PYTHON_SPRT_MIN_RATE ou 0.1)')
+    parser.add_argument('--discovery-rounds', type=int,
+                        default=int(os.environ.get('PYTHON_DISCOVERY_ROUNDS', 0)),
+                        help='Rodadas completas de descoberta; as demais reexecutam só os testes que falharam '
+                             '(default: PYTHON_DISCOVERY_ROUNDS ou 0 = desativado)')
+    parser.add_argument('--in-process', action='store_true',
+                        default=os.environ.get('PYTHON_TEST_IN_PROCESS', '') not in ('', '0'),
+                        help='Todas as rodadas num único processo pytest (default: PYTHON_TEST_IN_PROCESS)')
+    parser.add_argument('pytest_args', nargs=argparse.REMAINDER,
+                        help='Argumentos extras do pytest (após --)')
+    args = parser.parse_args()
+
+    parallel = args.parallel if args.parallel > 0 else (os.cpu_count() or 1)
+    extra = [arg for arg in args.pytest_args if arg != '--']
+    pytest_cmd = ['pytest', '-q', '--maxfail=0', '-p', OUTCOMES_PLUGIN, *extra]
+
+    args.outdir.mkdir(parents=True, exist_ok=True)
+    if args.in_process:
+        if args.sequential or args.discovery_rounds:
+            parser.error('--in-process não pode ser combinado com --sequential ou --discovery-rounds')
+        run_in_process(args.rounds, args.outdir, pytest_cmd)
+        return 0
+
+    sequential = None
+    if args.sequential:
+        sequential = SequentialStop(args.significance_level, args.min_failure_rate)
+        # In two-phase mode the SPRT only decides when the confirmation rounds stop
+        max_rounds = (args.rounds - args.discovery_rounds if 0 < args.discovery_rounds < args.rounds
+                      else args.rounds)
+        if sequential.rounds_needed >= max_rounds:
+            print(f"Warning: the SPRT settles a test after {sequential.rounds_needed} identical rounds, "
+                  f"but at most {max_rounds} will run, so the campaign cannot stop early "
+                  f"(raise --rounds or --min-failure-rate)", flush=True)
+        else:
+            print(f"SPRT mode: stops once every test is settled (a clean suite needs "
+                  f"{sequential.rounds_needed} of {max_rounds} rounds)", flush=True)
+
+    if 0 < args.discovery_rounds < args.rounds:
+        asyncio.run(run_two_phases(args.discovery_rounds, args.rounds - args.discovery_rounds,
+                                   parallel, args.outdir, pytest_cmd, sequential))
+        return 0
+
+    print(f"Running up to {args.rounds} rounds, {parallel} at a time", flush=True)
+    asyncio.run(run_rounds(args.rounds, parallel, args.outdir, pytest_cmd, sequential))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -148,7 +148,8 @@ case "$MODE" in
         echo "📝 Generating analysis reports..."
         python visualization/analyze_results.py \
             --results-dir "$RESULTS_DIR" \
-            --output-dir "$OUTPUT_DIR"
+            --output-dir "$OUTPUT_DIR" \
+            --jobs "${ANALYZE_JOBS:-1}"
         ;;
 esac
 
@@ -9,35 +9,131 @@ e gera visualizações e relatórios detalhados.
 import os
 import json
 import glob
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
 import re
-from typing import Dict, List, Tuple
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
 import argparse
 
 # Import metrics module
-from metrics import FlakinessMetrics, TestMetrics, parse_pytest_runs_csv
+from metrics import (FlakinessAggregator, FlakinessMetrics, TestMetricsBatch, estimate_project_metrics,
+                     hash_sample, parse_pytest_outcomes, parse_pytest_phases,
+                     parse_pytest_runs_csv)
+from heavy_hitters import SKETCHES_FILENAME, SpaceSavingSketch, load_sketches, save_sketches
+from outcome_matrix import OutcomeMatrix, TestIndex
+from log_parsers import get_log_parser
+from results_cache import MANIFEST_FILENAME, ResultsManifest
+from results_store import LoadedRun, SQLiteResultsStore, read_parquet_dataset, write_parquet_dataset
+from time_index import TimeIndex
+
+
+class _InlineExecutor(Executor):
+    """Executor that runs each task immediately in the calling process (``--jobs 1``)."""
+    
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def _parse_run_job(results_dir: str, project: str, tool: str, run_dir: Path) -> Tuple:
+    """Process-pool entry point: parse one run directory without touching the cache."""
+    analyzer = FlakyTestAnalyzer(results_dir, use_cache=False)
+    return analyzer._parse_run(project, tool, run_dir)
+
+
+def _calculate_tests_metrics(outcomes: OutcomeMatrix) -> Tuple[FlakinessAggregator, TestMetricsBatch]:
+    """Process-pool entry point: per-test counts and flakiness metrics for one project."""
+    aggregator = FlakinessAggregator.from_matrix(outcomes)
+    return aggregator, aggregator.calculate_batch()
+
+
+def _calculate_pooled_metrics(runs: List[Tuple[OutcomeMatrix, int]]) -> Tuple[FlakinessAggregator, TestMetricsBatch]:
+    """Process-pool entry point: metrics over several runs, merging their per-test counts.
+    
+    Args:
+        runs: (outcomes, rounds) of each run; a test missing from a
+            run's runs.csv passed all of that run's rounds
+    """
+    counts = [(FlakinessAggregator.from_matrix(outcomes), rounds) for outcomes, rounds in runs]
+    all_tests = {test for run_counts, _ in counts for test in run_counts.test_names}
+    aggregator = FlakinessAggregator()
+    for run_counts, rounds in counts:
+        for test in all_tests - set(run_counts.test_names):
+            run_counts.add_counts(test, 0, rounds)
+        aggregator.merge(run_counts)
+    return aggregator, aggregator.calculate_batch()
+
 
 class FlakyTestAnalyzer:
-    def __init__(self, results_dir: str):
+    def __init__(self, results_dir: str, use_cache: bool = True, jobs: int = 1,
+                 pool_commits: bool = False, sample_rate: Optional[float] = None):
         self.results_dir = Path(results_dir)
+        # Worker processes for parsing runs and computing metrics (0 = all cores)
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        # Pool every pytest run of the latest run's commit instead of using only the latest run
+        self.pool_commits = pool_commits
+        # Fraction of test ids (hash-sampled) used for approximate per-test metrics; None = all
+        if sample_rate is not None and not 0 < sample_rate <= 1:
+            raise ValueError(f"sample_rate deve estar em (0, 1], recebido {sample_rate}")
+        self.sample_rate = sample_rate
+        # Unsampled (project, tool, run_dir, run_data, outcomes) of a sampled preview, for full_analysis
+        self._unsampled_runs: List[LoadedRun] = []
         self.projects = []
         self.tools = []
         self.data = []
-        self.test_metrics = {}  # project -> test_name -> TestMetrics
+        self.test_metrics = {}  # project -> per-test metrics DataFrame, indexed by interned test id
         self.project_metrics = {}  # project -> aggregate metrics
+        self.aggregators = {}  # project -> FlakinessAggregator (per-test failure/run counts)
+        # Same, for the latest pytest-inprocess run: kept apart so state leaking
+        # between in-process rounds does not mix with process-per-round results
+        self.inprocess_metrics = {}  # project -> per-test metrics DataFrame
+        self.inprocess_aggregators = {}  # project -> FlakinessAggregator
+        # project -> tool -> [(run_dir, run_data, outcomes)], outcomes an OutcomeMatrix or None
+        self.runs_by_project = {}
+        self.test_index = {}  # project -> TestIndex (interned test ids)
+        self.outcome_matrices = {}  # project -> tool -> OutcomeMatrix
+        self.co_failures = {}  # project -> {'pairs': [CoFailurePair], 'clusters': [[test]]}
+        self.run_stability = {}  # project -> tool -> run × run Jaccard DataFrame
+        self.flaky_sketches = {}  # project -> tool -> SpaceSavingSketch of reported flaky tests
+        self._counted_runs = set()  # manifest keys of the runs folded into flaky_sketches
+        self._cached_runs = set()  # manifest keys served unchanged from the manifest in this scan
+        self._time_index = None  # TimeIndex of self.data, built on first use
+        self._time_index_runs = 0  # len(self.data) when it was built
+        # Manifest of already-parsed run directories (see results_cache.py)
+        self.manifest = (
+            ResultsManifest(self.results_dir / MANIFEST_FILENAME)
+            if use_cache and self.results_dir.is_dir() else None
+        )
         
     def scan_results(self) -> None:
-        """Escaneia o diretório de resultados e coleta todos os dados."""
+        """Escaneia o diretório de resultados e coleta todos os dados.
+
+        The results tree is walked exactly once: every run directory is
+        parsed into a run record, and the per-project metrics are computed
+        afterwards from those records instead of re-reading the artifacts.
+        Run directories are independent, so with ``jobs > 1`` they are parsed
+        (and the per-project metrics computed) in a process pool.
+        """
         print("🔍 Escaneando resultados...")
         
+        # Filled during the single walk
+        runs_by_project = self.runs_by_project
+        run_dirs = []  # (project, tool, run_dir) in walk order
+        
         for project_dir in self.results_dir.iterdir():
             if not project_dir.is_dir():
                 continue
                 
             project_name = project_dir.name
             self.projects.append(project_name)
+            project_runs = runs_by_project.setdefault(project_name, {})
             
             for tool_dir in project_dir.iterdir():
                 if not tool_dir.is_dir():
@@ -46,100 +142,535 @@ class FlakyTestAnalyzer:
                 tool_name = tool_dir.name
                 if tool_name not in self.tools:
                     self.tools.append(tool_name)
+                project_runs.setdefault(tool_name, [])
                 
                 # Processa cada execução da ferramenta
                 for run_dir in tool_dir.iterdir():
                     if not run_dir.is_dir():
                         continue
-                        
-                    run_data = self._parse_run_results(project_name, tool_name, run_dir)
-                    if run_data:
-                        self.data.append(run_data)
+                    run_dirs.append((project_name, tool_name, run_dir))
+        
+        with self._create_executor() as executor:
+            loaded = self._load_runs(run_dirs, executor)
+            if self.sample_rate is not None:
+                # Runs are parsed (and cached) whole; the preview samples them afterwards
+                self._unsampled_runs = [(*run, run_data, outcomes) for run, (run_data, outcomes)
+                                        in zip(run_dirs, loaded) if run_data]
+                loaded = [self._sample_run(run_data, outcomes) for run_data, outcomes in loaded]
+            for (project_name, tool_name, run_dir), (run_data, outcomes) in zip(run_dirs, loaded):
+                if run_data:
+                    self.data.append(run_data)
+                runs_by_project[project_name][tool_name].append((run_dir, run_data, outcomes))
+            self._update_sketches(run_dirs, loaded)
+            
+            print(f"✅ Encontrados {len(self.data)} execuções em {len(self.projects)} projetos usando {len(self.tools)} ferramentas")
+            
+            if self.manifest is not None:
+                print(f"♻️  {self.manifest.hits} execuções reaproveitadas do cache, {self.manifest.misses} processadas")
+                self.manifest.save()
+            
+            # Calculate metrics for all projects
+            print("📊 Calculando métricas de flakiness...")
+            self._calculate_all_metrics(runs_by_project, executor)
+    
+    def load_dataset(self, dataset_dir: str) -> None:
+        """Carrega as execuções de um dataset Parquet em vez da árvore de resultados.
+        
+        The dataset is the one written by ``export_dataset``; run records and
+        per-round test outcomes are read back from it and the metrics are
+        computed exactly as after ``scan_results``.
+        """
+        print(f"📦 Carregando dataset Parquet de {dataset_dir}...")
+        self._load_stored_runs(read_parquet_dataset(dataset_dir))
+    
+    def load_database(self, db_path: str) -> None:
+        """Carrega as execuções de um banco SQLite escrito por ``export_database``."""
+        print(f"🗄️  Carregando banco SQLite {db_path}...")
+        with SQLiteResultsStore(db_path) as store:
+            self._load_stored_runs(store.read())
+    
+    def _load_stored_runs(self, loaded: List[LoadedRun]) -> None:
+        """Register runs read from a results store and compute their metrics."""
+        if self.sample_rate is not None:
+            self._unsampled_runs = list(loaded)
+        for project, tool, run_dir, run_data, outcomes in loaded:
+            run_data, outcomes = self._sample_run(run_data, outcomes)
+            if project not in self.projects:
+                self.projects.append(project)
+            if tool not in self.tools:
+                self.tools.append(tool)
+            self.data.append(run_data)
+            self._count_flaky_tests(project, tool, run_data)
+            self.runs_by_project.setdefault(project, {}).setdefault(tool, []).append(
+                (run_dir, run_data, outcomes)
+            )
         
         print(f"✅ Encontrados {len(self.data)} execuções em {len(self.projects)} projetos usando {len(self.tools)} ferramentas")
         
-        # Calculate metrics for all projects
         print("📊 Calculando métricas de flakiness...")
-        self._calculate_all_metrics()
+        with self._create_executor() as executor:
+            self._calculate_all_metrics(self.runs_by_project, executor)
     
-    def _calculate_all_metrics(self) -> None:
-        """Calculate flakiness metrics for all tests in all projects."""
-        for project_dir in self.results_dir.iterdir():
-            if not project_dir.is_dir():
-                continue
+    def export_dataset(self, dataset_dir: Path) -> None:
+        """Exporta as execuções como dataset Parquet particionado (project/tool/run_date)."""
+        if not self.data:
+            return
+        
+        write_parquet_dataset(self.runs_by_project, dataset_dir)
+        print(f"✅ Dataset Parquet exportado para {dataset_dir}")
+    
+    def export_database(self, db_path: Path) -> None:
+        """Grava as execuções no banco SQLite indexado (ver ``SQLiteResultsStore``)."""
+        if not self.data:
+            return
+        
+        with SQLiteResultsStore(db_path) as store:
+            store.write(self.runs_by_project)
+        print(f"✅ Banco SQLite exportado para {db_path}")
+    
+    @property
+    def time_index(self) -> TimeIndex:
+        """Per-day prefix sums of the run records, for O(1) date-range totals."""
+        if self._time_index is None or self._time_index_runs != len(self.data):
+            self._time_index = TimeIndex.from_records(self.data)
+            self._time_index_runs = len(self.data)
+        return self._time_index
+    
+    def _update_sketches(self, run_dirs: List[Tuple[str, str, Path]],
+                         loaded: List[Tuple[Optional[Dict], Optional[OutcomeMatrix]]]) -> None:
+        """
+        Fold the flaky tests of the scanned runs into the sketches kept alongside the results.
+        
+        With the manifest cache enabled, the sketches saved by the previous
+        scan are reused and only runs they have not counted yet are added.
+        Counts cannot be taken back out, so if a counted run changed or
+        disappeared the sketches are rebuilt from every run instead.
+        """
+        sketches_path = self.results_dir / SKETCHES_FILENAME
+        # A sampled preview counts only the sampled tests: keep it apart from the full sketches
+        persist = self.manifest is not None and self.sample_rate is None
+        if persist and sketches_path.exists():
+            try:
+                sketches, counted = load_sketches(sketches_path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️  Sketches ignorados ({sketches_path}): {e}")
+            else:
+                if counted <= self._cached_runs:
+                    self.flaky_sketches, self._counted_runs = sketches, counted
+        
+        for (project, tool, run_dir), (run_data, _) in zip(run_dirs, loaded):
+            key = self._manifest_key(project, tool, run_dir)
+            if run_data and key not in self._counted_runs:
+                self._count_flaky_tests(project, tool, run_data)
+                self._counted_runs.add(key)
+        
+        if persist:
+            try:
+                save_sketches(self.flaky_sketches, sketches_path, self._counted_runs)
+            except OSError as e:
+                print(f"⚠️  Não foi possível salvar os sketches ({sketches_path}): {e}")
+    
+    def _count_flaky_tests(self, project: str, tool: str, run_data: Dict) -> None:
+        """Fold the flaky tests reported by a run into its project/tool sketch."""
+        sketch = self.flaky_sketches.setdefault(project, {}).setdefault(tool, SpaceSavingSketch())
+        sketch.update(run_data.get('flaky_tests') or [])
+    
+    def top_flaky_tests(self, project: Optional[str] = None, tools: Optional[List[str]] = None,
+                        limit: int = 20) -> pd.Series:
+        """Most frequently reported flaky tests, merging the sketches of the selected projects/tools.
+        
+        Returns:
+            Series of occurrences indexed by test name, like ``value_counts().head(limit)``
+        """
+        sketches = [
+            sketch
+            for project_name, tool_sketches in self.flaky_sketches.items() if project in (None, project_name)
+            for tool_name, sketch in tool_sketches.items() if tools is None or tool_name in tools
+        ]
+        return SpaceSavingSketch.merged(sketches).top(limit)
+    
+    def full_analysis(self) -> 'FlakyTestAnalyzer':
+        """Unsampled analysis of the runs this sampled preview loaded, without parsing them again.
+        
+        With the manifest cache, the preview already cached every run whole
+        and a rescan only checks fingerprints (and keeps the persisted
+        sketches up to date); otherwise the preview's unsampled runs are reused.
+        """
+        if self.sample_rate is None:
+            return self
+        analyzer = FlakyTestAnalyzer(self.results_dir, use_cache=self.manifest is not None, jobs=self.jobs,
+                                     pool_commits=self.pool_commits)
+        if analyzer.manifest is not None:
+            analyzer.scan_results()
+            return analyzer
+        
+        analyzer.projects, analyzer.tools = list(self.projects), list(self.tools)
+        analyzer._counted_runs = set(self._counted_runs)
+        analyzer._load_stored_runs(self._unsampled_runs)
+        return analyzer
+    
+    def _create_executor(self) -> Executor:
+        """Process pool sized by ``self.jobs``, or an inline executor for serial runs."""
+        if self.jobs > 1:
+            return ProcessPoolExecutor(max_workers=self.jobs)
+        return _InlineExecutor()
+    
+    def _load_runs(self, run_dirs: List[Tuple[str, str, Path]],
+                   executor: Executor) -> List[Tuple[Optional[Dict], Optional[OutcomeMatrix]]]:
+        """
+        Return the run record and per-test outcome matrix of each run directory.
+        
+        Directories whose files are unchanged since the last scan are served
+        from the manifest cache; everything else is parsed on ``executor``
+        and cached.
+        """
+        loaded = [None] * len(run_dirs)
+        pending = {}
+        
+        for i, (project, tool, run_dir) in enumerate(run_dirs):
+            if self.manifest is not None:
+                cached = self.manifest.get(self._manifest_key(project, tool, run_dir), run_dir)
+                if cached is not None:
+                    self._cached_runs.add(self._manifest_key(project, tool, run_dir))
+                    run_data = cached['record']
+                    run_data['run_dir'] = str(run_dir)
+                    loaded[i] = (run_data, cached['outcomes'])
+                    continue
             
-            project_name = project_dir.name
+            pending[i] = executor.submit(_parse_run_job, str(self.results_dir), project, tool, run_dir)
+        
+        for i, future in pending.items():
+            project, tool, run_dir = run_dirs[i]
+            run_data, outcomes = future.result()
+            loaded[i] = (run_data, outcomes)
+            
+            if self.manifest is not None and run_data:
+                self.manifest.put(self._manifest_key(project, tool, run_dir),
+                                  run_dir, run_data, outcomes)
+        
+        return loaded
+    
+    def _sample_run(self, run_data: Optional[Dict], outcomes: Optional[OutcomeMatrix]
+                    ) -> Tuple[Optional[Dict], Optional[OutcomeMatrix]]:
+        """Keep only the sampled test ids of a parsed run (a copy; the input is left as is).
+        
+        Runs are always parsed, cached and stored whole, so a preview and the
+        full analysis that follows it share the same parse.
+        """
+        if self.sample_rate is None:
+            return run_data, outcomes
+        if outcomes:
+            outcomes = outcomes.take(np.flatnonzero(hash_sample(outcomes.tests, self.sample_rate)))
+        if run_data and run_data.get('flaky_tests'):
+            flaky_tests = run_data['flaky_tests']
+            run_data = dict(run_data, sample_rate=self.sample_rate, flaky_tests=[
+                test for test, kept in zip(flaky_tests, hash_sample(flaky_tests, self.sample_rate)) if kept
+            ])
+            run_data['total_flaky'] = len(run_data['flaky_tests'])
+        return run_data, outcomes
+    
+    @staticmethod
+    def _manifest_key(project: str, tool: str, run_dir: Path) -> str:
+        return f"{project}/{tool}/{run_dir.name}"
+    
+    def _parse_run(self, project: str, tool: str,
+                   run_dir: Path) -> Tuple[Optional[Dict], Optional[OutcomeMatrix]]:
+        """Parse the run record and runs.csv outcome matrix of one run directory."""
+        run_data, outcomes = self._parse_run_results(project, tool, run_dir), self._parse_test_outcomes(run_dir)
+        log_parser = get_log_parser(tool)
+        if run_data and outcomes is not None and log_parser is not None:
+            run_data.update(log_parser.parse_outcomes(outcomes))
+        return run_data, outcomes
+    
+    def _parse_test_outcomes(self, run_dir: Path) -> Optional[OutcomeMatrix]:
+        """Extract the per-round test outcomes of a run's outcome files or runs.csv (and confirm_runs.csv)."""
+        runs_csv = run_dir / "runs.csv"
+        outcome_files = self._outcome_files(run_dir)
+        if not (outcome_files or runs_csv.exists()):
+            return None
+        
+        try:
+            # Per-round outcomes of every test (pytest_outcomes plugin): true denominators
+            if outcome_files:
+                return parse_pytest_outcomes([str(path) for path in outcome_files])
+            # Two-phase runs also rerun the failed tests in confirm_runs.csv
+            confirm_csv = run_dir / "confirm_runs.csv"
+            if confirm_csv.exists():
+                focus_file = run_dir / "confirm_nodeids.txt"
+                # One nodeid per line: parametrized ids may contain spaces
+                focus = ([line for line in focus_file.read_text(encoding='utf-8').splitlines() if line.strip()]
+                         if focus_file.exists() else None)
+                return parse_pytest_phases(str(runs_csv), str(confirm_csv), focus)
+            return parse_pytest_runs_csv(str(runs_csv))
+        except Exception as e:
+            print(f"⚠️  Erro ao processar {runs_csv}: {e}")
+            return None
+    
+    @staticmethod
+    def _outcome_files(run_dir: Path) -> List[Path]:
+        """run_N.jsonl in round order, followed by confirm_N.jsonl of a two-phase run."""
+        def round_number(path: Path) -> int:
+            return int(path.stem.rsplit('_', 1)[-1])
+        return [path for prefix in ('run', 'confirm')
+                for path in sorted(run_dir.glob(f'{prefix}_*.jsonl'), key=round_number)]
+    
+    def _calculate_all_metrics(self, runs_by_project: Dict[str, Dict[str, List[Tuple]]],
+                               executor: Optional[Executor] = None) -> None:
+        """Calculate flakiness metrics for all tests in all projects.
+        
+        Args:
+            runs_by_project: project -> tool -> list of
+                (run_dir, run_data, outcomes) collected by ``scan_results``
+            executor: Where the per-test metrics of each project are computed
+                (defaults to the calling process)
+        """
+        executor = executor or _InlineExecutor()
+        if self.sample_rate is not None:
+            # Runs were sampled as they were loaded
+            print(f"🎲 Prévia amostral: {self.sample_rate:.0%} dos testes (métricas aproximadas)")
+        
+        # Per-test metrics are the expensive part: submit every project up
+        # front so a process pool can work on them concurrently.
+        pending = {}
+        pending_inprocess = {}
+        for project_name, tool_runs in runs_by_project.items():
+            # In-process rounds (run_N.jsonl of one pytest process) are never pooled
+            inprocess = self._latest_outcomes(tool_runs.get('pytest-inprocess', []))
+            if inprocess:
+                pending_inprocess[project_name] = executor.submit(_calculate_tests_metrics, inprocess)
             
             # Look for pytest-rerun results (has runs.csv with per-test data)
-            pytest_dir = project_dir / "pytest-rerun"
-            if pytest_dir.exists():
-                self._calculate_pytest_metrics(project_name, pytest_dir)
+            pytest_runs = tool_runs.get('pytest-rerun', [])
+            if self.pool_commits:
+                commit_runs = self._same_commit_runs(pytest_runs)
+                if any(outcomes for outcomes, _ in commit_runs):
+                    pending[project_name] = executor.submit(_calculate_pooled_metrics, commit_runs)
+                    if len(commit_runs) > 1:
+                        rounds = sum(r for _, r in commit_runs)
+                        print(f"  ∑ {project_name}: {len(commit_runs)} execuções do mesmo commit agrupadas ({rounds} rodadas)")
+                continue
+            
+            outcomes = self._latest_outcomes(pytest_runs)
+            if outcomes:
+                pending[project_name] = executor.submit(_calculate_tests_metrics, outcomes)
+        
+        for project_name, tool_runs in runs_by_project.items():
+            if project_name in pending:
+                self._calculate_pytest_metrics(project_name, pending[project_name])
+            if project_name in pending_inprocess:
+                self._calculate_inprocess_metrics(project_name, pending_inprocess[project_name])
             
             # Look for nondex results (Java projects)
-            nondex_dir = project_dir / "nondex"
-            if nondex_dir.exists():
-                self._calculate_nondex_metrics(project_name, nondex_dir)
-    
-    def _calculate_pytest_metrics(self, project_name: str, pytest_dir: Path) -> None:
-        """Calculate metrics for pytest results."""
-        # Find the most recent run directory
-        run_dirs = sorted(pytest_dir.glob("*/"), reverse=True)
-        if not run_dirs:
-            return
+            if 'nondex' in tool_runs:
+                self._calculate_nondex_metrics(project_name, tool_runs['nondex'])
         
-        run_dir = run_dirs[0]  # Most recent
-        runs_csv = run_dir / "runs.csv"
+        self._build_outcome_matrices(runs_by_project)
+        self._calculate_co_failures()
+        self._calculate_run_stability(runs_by_project)
+    
+    def _build_outcome_matrices(self, runs_by_project: Dict[str, Dict[str, List[Tuple]]]) -> None:
+        """Intern each project's test ids and pack its outcomes into bit matrices.
+        
+        pytest-rerun contributes the rounds × tests failures of its latest
+        run (the data the per-test metrics use); tools that report flaky
+        tests per run contribute a runs × tests detection matrix, in run order.
+        """
+        for project_name, tool_runs in runs_by_project.items():
+            index = self.test_index.setdefault(project_name, TestIndex())
+            matrices = {}
+            
+            for tool_name, runs in tool_runs.items():
+                outcomes = self._latest_outcomes(runs)
+                if outcomes:
+                    matrices[tool_name] = outcomes.reindex(index)
+                    continue
+                
+                detections = [run_data.get('flaky_tests') or []
+                              for _, run_data, _ in sorted(runs, key=lambda run: run[0]) if run_data]
+                if any(detections):
+                    matrices[tool_name] = OutcomeMatrix.from_rows(detections, index)
+            
+            if matrices:
+                self.outcome_matrices[project_name] = matrices
+    
+    def _calculate_co_failures(self) -> None:
+        """Correlate the per-round failures of every pair of pytest tests in each project."""
+        for project_name, matrices in self.outcome_matrices.items():
+            matrix = matrices.get('pytest-rerun')
+            if matrix is None:
+                continue
+            
+            ran = matrix.ran_mask() if matrix.ran is not None else None
+            result = FlakinessMetrics.co_failure_analysis(matrix.to_dense(), matrix.tests.names, ran=ran)
+            if result['pairs']:
+                self.co_failures[project_name] = result
+                print(f"  🔗 {project_name}: {len(result['pairs'])} pares de testes com falhas correlacionadas")
+    
+    @staticmethod
+    def _run_detections(run_data: Dict, outcomes: Optional[OutcomeMatrix]) -> List[str]:
+        """Tests a run reported as flaky, or that failed in some but not all of its rounds."""
+        if run_data.get('flaky_tests'):
+            return run_data['flaky_tests']
+        if not outcomes:
+            return []
+        failures, runs = outcomes.failures_per_test(), outcomes.runs_per_test()
+        return [outcomes.tests.name_of(i) for i in np.flatnonzero((0 < failures) & (failures < runs))]
+    
+    def _calculate_run_stability(self, runs_by_project: Dict[str, Dict[str, List[Tuple]]]) -> None:
+        """Jaccard similarity between the detections of every pair of runs of each project and tool.
         
-        if not runs_csv.exists():
+        A detector whose runs mostly agree (values near 1) gives reproducible
+        results; low values mean each run reports a different set of tests.
+        """
+        for project_name, tool_runs in runs_by_project.items():
+            index = self.test_index.setdefault(project_name, TestIndex())
+            for tool_name, runs in tool_runs.items():
+                runs = sorted((run for run in runs if run[1]), key=lambda run: run[0])
+                if len(runs) < 2:
+                    continue
+                
+                detections = OutcomeMatrix.from_rows(
+                    (self._run_detections(run_data, outcomes) for _, run_data, outcomes in runs), index
+                )
+                if not detections.packed.any():
+                    continue
+                
+                timestamps = [run_data['timestamp'] for _, run_data, _ in runs]
+                self.run_stability.setdefault(project_name, {})[tool_name] = pd.DataFrame(
+                    FlakinessMetrics.jaccard_matrix(detections.to_dense()), index=timestamps, columns=timestamps
+                )
+    
+    def export_outcome_matrices(self, output_dir: Path) -> None:
+        """Salva as matrizes de resultados como ``<projeto>/<ferramenta>.npy`` (mapeáveis em memória)."""
+        if not self.outcome_matrices:
             return
         
+        for project_name, matrices in self.outcome_matrices.items():
+            for tool_name, matrix in matrices.items():
+                matrix.save(output_dir / project_name / f"{tool_name}.npy")
+        
+        total_bytes = sum(m.nbytes for matrices in self.outcome_matrices.values() for m in matrices.values())
+        print(f"✅ Matrizes de resultados exportadas para {output_dir} ({total_bytes / 1024:.1f} KB)")
+    
+    @staticmethod
+    def _latest_outcomes(runs: List[Tuple]) -> Optional[OutcomeMatrix]:
+        """Per-test outcome matrix of the most recent pytest run directory."""
+        if not runs:
+            return None
+        
+        # Find the most recent run directory (per-test data parsed from its runs.csv)
+        _, _, outcomes = max(runs, key=lambda run: run[0])
+        return outcomes
+    
+    @staticmethod
+    def _same_commit_runs(runs: List[Tuple]) -> List[Tuple[OutcomeMatrix, int]]:
+        """(outcomes, rounds) of every run with runs.csv at the latest run's commit.
+        
+        Runs are matched by the hash in their ``commit.txt``; a latest run
+        without one is used alone.
+        """
+        runs = [run for run in runs if run[1] and run[2] is not None]
+        if not runs:
+            return []
+        
+        latest = max(runs, key=lambda run: run[0])
+        commit = latest[1].get('commit')
+        selected = [run for run in runs if commit and run[1].get('commit') == commit] or [latest]
+        
+        pooled = []
+        for _, run_data, outcomes in selected:
+            if run_data.get('per_test_outcomes'):
+                # Every test that ran is a column of outcomes; a missing test did not run
+                rounds = 0
+            elif 'confirmation_rounds' in run_data:
+                # Two-phase run: tests that never failed only ran the full-suite rounds
+                rounds = run_data.get('rounds') or 0
+            else:
+                rounds = outcomes.n_runs or run_data.get('rounds') or 0
+            pooled.append((outcomes, int(rounds)))
+        return pooled
+    
+    def _calculate_pytest_metrics(self, project_name: str, pending: Future) -> None:
+        """Store metrics for pytest results once the per-test computation finishes."""
         try:
-            # Parse CSV to get per-test failure data
-            test_failures = parse_pytest_runs_csv(str(runs_csv))
+            aggregator, batch = pending.result()
             
-            if not test_failures:
-                return
+            self.aggregators[project_name] = aggregator
+            self._store_test_metrics(project_name, aggregator, batch)
             
-            # Calculate metrics for each test
-            project_test_metrics = {}
-            for test_name, failure_list in test_failures.items():
-                metrics = FlakinessMetrics.calculate_test_metrics(test_name, failure_list)
-                project_test_metrics[test_name] = metrics
+            print(f"  ✓ {project_name}: {len(batch)} tests analyzed")
             
-            self.test_metrics[project_name] = project_test_metrics
+        except Exception as e:
+            print(f"  ⚠️ Erro ao calcular métricas para {project_name}: {e}")
+    
+    def _calculate_inprocess_metrics(self, project_name: str, pending: Future) -> None:
+        """Store the per-test metrics of a project's latest pytest-inprocess run."""
+        try:
+            aggregator, batch = pending.result()
             
-            # Calculate aggregate project metrics
-            metrics_list = list(project_test_metrics.values())
-            self.project_metrics[project_name] = FlakinessMetrics.calculate_project_metrics(metrics_list)
+            self.inprocess_aggregators[project_name] = aggregator
+            self._store_inprocess_metrics(project_name, aggregator, batch)
             
-            print(f"  ✓ {project_name}: {len(project_test_metrics)} tests analyzed")
+            print(f"  ✓ {project_name} (pytest-inprocess): {len(batch)} tests analyzed")
             
         except Exception as e:
-            print(f"  ⚠️ Erro ao calcular métricas para {project_name}: {e}")
+            print(f"  ⚠️ Erro ao calcular métricas in-process para {project_name}: {e}")
     
-    def _calculate_nondex_metrics(self, project_name: str, nondex_dir: Path) -> None:
-        """Calculate aggregate metrics for NonDex results (Java projects)."""
+    def reclassify(self, significance_level: Optional[float] = None) -> None:
+        """Recompute per-test and project metrics from the stored counts.
+        
+        Applies a different significance level (or SEVERITY_THRESHOLDS
+        changed on ``FlakinessMetrics``) without re-reading any run.
+        """
+        for project_name, aggregator in self.aggregators.items():
+            self._store_test_metrics(project_name, aggregator, aggregator.calculate_batch(significance_level))
+        for project_name, aggregator in self.inprocess_aggregators.items():
+            self._store_inprocess_metrics(project_name, aggregator, aggregator.calculate_batch(significance_level))
+    
+    def _store_test_metrics(self, project_name: str, aggregator: FlakinessAggregator,
+                            batch: TestMetricsBatch) -> None:
+        """Keep a project's per-test metrics as one table and derive its aggregate metrics.
+        
+        Rows are indexed by the test ids interned in ``self.test_index``, so
+        the table lines up with the project's outcome matrices.
+        """
+        index = self.test_index.setdefault(project_name, TestIndex())
+        metrics = batch.to_frame(aggregator.test_names, index.intern_all(aggregator.test_names))
+        self.test_metrics[project_name] = metrics
+        if self.sample_rate is not None:
+            self.project_metrics[project_name] = estimate_project_metrics(metrics, self.sample_rate)
+        else:
+            self.project_metrics[project_name] = FlakinessMetrics.calculate_project_metrics_frame(metrics)
+    
+    def _store_inprocess_metrics(self, project_name: str, aggregator: FlakinessAggregator,
+                                 batch: TestMetricsBatch) -> None:
+        """Keep the per-test metrics of in-process rounds, indexed like ``_store_test_metrics``."""
+        index = self.test_index.setdefault(project_name, TestIndex())
+        self.inprocess_metrics[project_name] = batch.to_frame(
+            aggregator.test_names, index.intern_all(aggregator.test_names)
+        )
+    
+    def _calculate_nondex_metrics(self, project_name: str, runs: List[Tuple]) -> None:
+        """Calculate aggregate metrics for NonDex results (Java projects).
+        
+        Uses the flaky tests and test counts already extracted into each run
+        record by ``_parse_run_results``, so ``nondex.log`` is not re-read.
+        """
         try:
             # Collect all flaky tests detected across all NonDex runs
             all_flaky_tests = set()
             total_tests_run = 0
             
-            # Find all run directories
-            run_dirs = sorted(nondex_dir.glob("*/"))
-            if not run_dirs:
+            if not runs:
                 return
             
-            for run_dir in run_dirs:
-                log_file = run_dir / "nondex.log"
-                if not log_file.exists():
+            for _, run_data, _ in runs:
+                if not run_data:
                     continue
                 
-                # Extract flaky tests from this run
-                flaky_tests = self._extract_flaky_tests(log_file, 'nondex')
-                all_flaky_tests.update(flaky_tests)
+                all_flaky_tests.update(run_data.get('flaky_tests') or [])
                 
-                # Try to get total tests count from the log
-                tests_count = self._extract_total_tests(log_file, 'nondex')
+                tests_count = run_data.get('total_tests')
                 if tests_count and tests_count > total_tests_run:
                     total_tests_run = tests_count
             
@@ -161,12 +692,38 @@ class FlakyTestAnalyzer:
                 'tool': 'nondex',
                 'note': 'NonDex metrics are based on nondeterminism detection, not multiple reruns'
             }
+            if self.sample_rate is not None:
+                self._estimate_nondex_metrics(self.project_metrics[project_name])
             
             print(f"  ✓ {project_name}: {flaky_count} flaky tests detected (NonDex)")
             
         except Exception as e:
             print(f"  ⚠️ Erro ao calcular métricas NonDex para {project_name}: {e}")
     
+    def _estimate_nondex_metrics(self, metrics: Dict) -> None:
+        """Scale NonDex metrics counted over the sampled flaky tests up to the whole suite.
+        
+        Same Poisson-sampling estimate as ``estimate_project_metrics``; the
+        test total comes from the Maven summary and stays exact.
+        """
+        rate = self.sample_rate
+        fpc = 1 - rate
+        n_flaky, total = metrics['flaky_tests'], metrics['total_tests']
+        flaky_tests = int(round(n_flaky / rate))
+        flaky_se = float(np.sqrt(n_flaky * fpc) / rate)
+        metrics.update({
+            'flaky_tests': flaky_tests,
+            'flaky_percentage': 100 * flaky_tests / total if total > 0 else 0.0,
+            'severity_distribution': {'nondex_detected': flaky_tests},
+            'sample_rate': rate,
+            'standard_errors': {
+                'total_tests': 0.0,
+                'flaky_tests': flaky_se,
+                'flaky_percentage': 100 * flaky_se / total if total > 0 else 0.0,
+                'avg_failure_rate': 0.0
+            }
+        })
+    
     def _parse_run_results(self, project: str, tool: str, run_dir: Path) -> Dict:
         """Extrai dados de uma execução específica."""
         try:
@@ -175,7 +732,6 @@ class FlakyTestAnalyzer:
             # Lê o arquivo de summary se existir
             summary_file = run_dir / "summary.txt"
             metadata_file = run_dir / "metadata.json"
-            log_file = run_dir / f"{tool}.log"
             
             run_data = {
                 'project': project,
@@ -209,11 +765,15 @@ class FlakyTestAnalyzer:
                     run_data['failed_lines'] = int(failed_match.group(1))
             
             # Parse log para detectar testes flaky e total de testes
-            if log_file.exists():
-                flaky_tests = self._extract_flaky_tests(log_file, tool)
-                run_data['flaky_tests'] = flaky_tests
-                run_data['total_flaky'] = len(flaky_tests)
-                run_data['total_tests'] = self._extract_total_tests(log_file, tool)
+            # (see log_parsers.py for the parser registered for each tool)
+            log_parser = get_log_parser(tool)
+            if log_parser is not None:
+                run_data.update(log_parser.parse_run(run_dir))
+            
+            # Commit testado (commit.txt, escrito pelos scripts de detecção)
+            commit_file = run_dir / "commit.txt"
+            if commit_file.exists():
+                run_data['commit'] = commit_file.read_text(encoding='utf-8').strip()
             
             # Parse metadata.json se existir
             if metadata_file.exists():
@@ -229,78 +789,24 @@ class FlakyTestAnalyzer:
     
     def _extract_flaky_tests(self, log_file: Path, tool: str) -> List[str]:
         """Extrai lista de testes flaky do log."""
-        flaky_tests = []
+        log_parser = get_log_parser(tool)
+        if log_parser is None:
+            return []
         
         try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            if tool == 'nondex':
-                # Para NonDex, procura por padrões de testes que falharam inconsistentemente
-                # Padrão típico: [WARNING] org.package.ClassName#testMethod
-                # O padrão deve começar na linha e capturar o formato completo
-                warning_pattern = r'^\[WARNING\]\s+([^\s]+)#([^\s]+)'
-                matches = re.findall(warning_pattern, content, re.MULTILINE)
-                
-                for match in matches:
-                    test_class = match[0]
-                    test_method = match[1]
-                    test_name = f"{test_class}#{test_method}"
-                    if test_name not in flaky_tests:
-                        flaky_tests.append(test_name)
-            
-            elif tool == 'idflakies':
-                # Para iDFlakies, procura por padrões específicos
-                # Adaptar conforme o formato de saída do iDFlakies
-                pass
-                
+            return log_parser.extract_flaky_tests(log_file)
         except Exception as e:
             print(f"⚠️  Erro ao extrair testes flaky de {log_file}: {e}")
-            
-        return flaky_tests
+            return []
     
     def _extract_total_tests(self, log_file: Path, tool: str) -> int:
         """Extrai o número total de testes no projeto (não apenas os executados)."""
-        try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            if tool == 'pytest-rerun':
-                # Pytest format at the end: "2 failed, 1017 passed, 5 skipped, 4 xfailed, 143 warnings in 125.07s"
-                # Look for the summary line (usually near the end)
-                for line in reversed(lines):
-                    # Match pytest summary that includes timing
-                    if re.search(r'in\s+[\d.]+s', line):
-                        total = 0
-                        # Extract all test counts from the summary line
-                        for match in re.finditer(r'(\d+)\s+(failed|passed|skipped|error|xfailed|xpassed)', line):
-                            total += int(match.group(1))
-                        if total > 0:
-                            return total
-                        
-            elif tool == 'nondex':
-                # Maven NonDex format: "[WARNING] Tests run: 18549, Failures: 0, Errors: 0, Skipped: 20"
-                # Look for the final summary (appears after "Results:")
-                found_results = False
-                for i in range(len(lines) - 1, -1, -1):
-                    line = lines[i]
-                    
-                    # Look for summary with WARNING/INFO prefix
-                    match = re.search(r'\[(WARNING|INFO)\]\s+Tests run:\s+(\d+)', line)
-                    if match:
-                        return int(match.group(2))
-                    
-                    # Also check for lines after "Results:"
-                    if 'Results:' in line:
-                        found_results = True
-                        # Check next few lines for the test count
-                        for j in range(i + 1, min(i + 10, len(lines))):
-                            match = re.search(r'Tests run:\s+(\d+)', lines[j])
-                            if match:
-                                return int(match.group(1))
-            
+        log_parser = get_log_parser(tool)
+        if log_parser is None:
             return None
-            
+        
+        try:
+            return log_parser.extract_total_tests(log_file)
         except Exception as e:
             print(f"⚠️  Erro ao extrair total de testes de {log_file}: {e}")
             return None
@@ -336,12 +842,8 @@ class FlakyTestAnalyzer:
             report.append(f"- Média de linhas de erro: {avg_errors:.1f}")
             
             # Lista os testes flaky mais frequentes
-            all_flaky = []
-            for _, row in project_data.iterrows():
-                all_flaky.extend(row['flaky_tests'])
-            
-            if all_flaky:
-                flaky_counts = pd.Series(all_flaky).value_counts().head(5)
+            flaky_counts = self.top_flaky_tests(project, limit=5)
+            if not flaky_counts.empty:
                 report.append("- **Top 5 testes flaky mais frequentes:**")
                 for test, count in flaky_counts.items():
                     report.append(f"  - {test}: {count} ocorrências")
@@ -358,8 +860,47 @@ class FlakyTestAnalyzer:
             report.append(f"- Média de erros por execução: {tool_data['error_lines'].mean():.1f}")
             report.append("")
         
+        # Reprodutibilidade das detecções entre execuções
+        if self.run_stability:
+            report.append("## 🔁 Estabilidade entre Execuções\n")
+            for project, tools in self.run_stability.items():
+                for tool, matrix in tools.items():
+                    values = matrix.to_numpy()
+                    pairs = values[np.triu_indices(len(values), k=1)]
+                    report.append(f"- **{project} / {tool}:** {len(values)} execuções, "
+                                  f"Jaccard médio {pairs.mean():.2f} (mín. {pairs.min():.2f})")
+            report.append("")
+        
+        # Falhas correlacionadas (possíveis fixtures/estado compartilhados)
+        if self.co_failures:
+            report.append("## 🔗 Falhas Correlacionadas\n")
+            for project, result in self.co_failures.items():
+                report.append(f"### {project}")
+                for pair in result['pairs'][:5]:
+                    report.append(f"- {pair.test_a} ↔ {pair.test_b}: {pair.co_failures} falhas juntas "
+                                  f"(phi={pair.phi_coefficient:.2f}, p={pair.p_value:.4f})")
+                for i, cluster in enumerate(result['clusters'][:3], start=1):
+                    report.append(f"- **Grupo {i}** ({len(cluster)} testes): {', '.join(cluster)}")
+                report.append("")
+        
         return "\n".join(report)
     
+    def generate_sample_preview(self) -> str:
+        """Métricas aproximadas por projeto (± erro padrão) de uma análise com ``sample_rate``."""
+        lines = [f"🎲 Prévia com {self.sample_rate:.0%} dos testes (± erro padrão):"]
+        for project, pm in self.project_metrics.items():
+            se = pm.get('standard_errors')
+            if se is None:
+                lines.append(f"  - {project}: {pm['flaky_tests']} testes flaky de {pm['total_tests']} (exato)")
+                continue
+            lines.append(
+                f"  - {project}: ~{pm['total_tests']} ± {se['total_tests']:.0f} testes, "
+                f"~{pm['flaky_tests']} ± {se['flaky_tests']:.0f} flaky "
+                f"({pm['flaky_percentage']:.2f}% ± {se['flaky_percentage']:.2f}%), "
+                f"taxa média de falha {pm['avg_failure_rate']:.1%} ± {se['avg_failure_rate']:.1%}"
+            )
+        return "\n".join(lines)
+    
     def generate_visualizations(self, output_dir: Path) -> None:
         """Prepara dados para visualização (gráficos gerados via HTML/dashboard)."""
         if not self.data:
@@ -445,41 +986,100 @@ class FlakyTestAnalyzer:
         
         # Export detailed test metrics
         self._export_test_metrics(output_dir)
+        self._export_co_failures(output_dir)
+        self._export_run_stability(output_dir)
+        if self.flaky_sketches:
+            save_sketches(self.flaky_sketches, output_dir / 'top_flaky_sketches.json', self._counted_runs)
         
         print(f"✅ Dados exportados para {output_dir}")
     
+    def _export_co_failures(self, output_dir: Path) -> None:
+        """Export the correlated test pairs of every project to CSV."""
+        rows = []
+        for project, result in self.co_failures.items():
+            cluster_of = {test: i for i, cluster in enumerate(result['clusters'], start=1) for test in cluster}
+            for pair in result['pairs']:
+                rows.append({
+                    'project': project,
+                    'test_a': pair.test_a,
+                    'test_b': pair.test_b,
+                    'co_failures': pair.co_failures,
+                    'phi': pair.phi_coefficient,
+                    'chi_square': pair.chi_square,
+                    'p_value': pair.p_value,
+                    'cluster': cluster_of.get(pair.test_a)
+                })
+        
+        if rows:
+            pd.DataFrame(rows).to_csv(output_dir / 'co_failures.csv', index=False)
+    
+    def _export_run_stability(self, output_dir: Path) -> None:
+        """Export the run-to-run Jaccard matrices to CSV (one row per pair of runs)."""
+        frames = []
+        for project, tools in self.run_stability.items():
+            for tool, matrix in tools.items():
+                pairs = matrix.rename_axis(index='run_a', columns='run_b').stack().rename('jaccard').reset_index()
+                pairs.insert(0, 'tool', tool)
+                pairs.insert(0, 'project', project)
+                frames.append(pairs)
+        
+        if frames:
+            pd.concat(frames, ignore_index=True).to_csv(output_dir / 'run_stability.csv', index=False)
+    
     def _export_test_metrics(self, output_dir: Path) -> None:
         """Export detailed per-test metrics to CSV."""
+        if self.inprocess_metrics:
+            inprocess_df = self._metrics_table(self.inprocess_metrics)
+            if not inprocess_df.empty:
+                inprocess_df.to_csv(output_dir / 'test_metrics_inprocess.csv', index=False)
+        
         if not self.test_metrics:
             return
         
-        all_metrics = []
-        for project, tests in self.test_metrics.items():
-            for test_name, metrics in tests.items():
-                all_metrics.append({
-                    'project': project,
-                    'test_name': test_name,
-                    'total_runs': metrics.total_runs,
-                    'failures': metrics.failures,
-                    'failure_rate': metrics.failure_rate,
-                    'is_flaky': metrics.is_flaky,
-                    'severity': metrics.flakiness_severity,
-                    'variance': metrics.variance,
-                    'std_dev': metrics.std_dev,
-                    'ci_lower': metrics.confidence_interval_95[0],
-                    'ci_upper': metrics.confidence_interval_95[1],
-                    'p_value': metrics.p_value
-                })
-        
-        if all_metrics:
-            metrics_df = pd.DataFrame(all_metrics)
+        metrics_df = self._metrics_table(self.test_metrics)
+        if not metrics_df.empty:
             metrics_df.to_csv(output_dir / 'test_metrics_detailed.csv', index=False)
             
             # Export only flaky tests for easier analysis
-            flaky_df = metrics_df[metrics_df['is_flaky'] == True]
+            flaky_df = metrics_df[metrics_df['is_flaky']]
             if not flaky_df.empty:
                 flaky_df.to_csv(output_dir / 'flaky_tests_metrics.csv', index=False)
                 print(f"  📊 Exportadas métricas detalhadas de {len(flaky_df)} testes flaky")
+    
+    @staticmethod
+    def _metrics_table(metrics_by_project: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """Per-test metrics of every project in one table, with a leading ``project`` column."""
+        metrics_df = pd.concat(
+            [metrics.assign(project=project) for project, metrics in metrics_by_project.items()],
+            ignore_index=True
+        )
+        return metrics_df[['project'] + [c for c in metrics_df.columns if c != 'project']]
+
+def sample_fraction(value: str) -> float:
+    """Tipo do argparse para --sample: uma fração em (0, 1]."""
+    try:
+        fraction = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fração inválida: {value!r}")
+    if not 0 < fraction <= 1:
+        raise argparse.ArgumentTypeError(f"a fração deve estar em (0, 1], recebido {value}")
+    return fraction
+
+
+def load_analyzer(args, sample_rate: Optional[float] = None) -> FlakyTestAnalyzer:
+    """Inicializa o analisador e carrega as execuções da fonte escolhida na linha de comando."""
+    analyzer = FlakyTestAnalyzer(args.results_dir, jobs=args.jobs, pool_commits=args.pool_commit,
+                                 use_cache=not (args.no_cache or args.from_dataset or args.from_db),
+                                 sample_rate=sample_rate)
+    
+    # Escaneia e processa os resultados
+    if args.from_dataset:
+        analyzer.load_dataset(args.from_dataset)
+    elif args.from_db:
+        analyzer.load_database(args.from_db)
+    else:
+        analyzer.scan_results()
+    return analyzer
 
 def main():
     parser = argparse.ArgumentParser(description='Analisador de Resultados de Testes Flaky')
@@ -487,6 +1087,26 @@ def main():
                        help='Diretório com os resultados dos experimentos')
     parser.add_argument('--output-dir', default='visualization/reports',
                        help='Diretório de saída para os relatórios')
+    parser.add_argument('--no-cache', action='store_true',
+                       help=f'Reprocessa todas as execuções ignorando o cache ({MANIFEST_FILENAME})')
+    parser.add_argument('--jobs', type=int, default=1,
+                       help='Processos paralelos para processar as execuções (0 = todos os núcleos)')
+    parser.add_argument('--pool-commit', action='store_true',
+                       help='Agrupa as métricas de todas as execuções pytest do mesmo commit (commit.txt)')
+    parser.add_argument('--from-dataset',
+                       help='Carrega as execuções de um dataset Parquet em vez de --results-dir')
+    parser.add_argument('--export-dataset',
+                       help='Exporta também um dataset Parquet particionado neste diretório')
+    parser.add_argument('--export-matrices',
+                       help='Salva as matrizes de resultados (bits, .npy) neste diretório')
+    parser.add_argument('--from-db',
+                       help='Carrega as execuções de um banco SQLite em vez de --results-dir')
+    parser.add_argument('--export-db',
+                       help='Grava também as execuções neste banco SQLite')
+    parser.add_argument('--sample', type=sample_fraction, metavar='FRAÇÃO',
+                       help='Mostra só uma prévia aproximada com esta fração dos testes (ex.: 0.1)')
+    parser.add_argument('--full', action='store_true',
+                       help='Com --sample, segue com a análise completa depois da prévia')
     
     args = parser.parse_args()
     
@@ -494,11 +1114,19 @@ def main():
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Inicializa o analisador
-    analyzer = FlakyTestAnalyzer(args.results_dir)
-    
-    # Escaneia e processa os resultados
-    analyzer.scan_results()
+    if args.sample is not None:
+        # Prévia amostral; a análise completa só segue com --full, sobre as mesmas execuções
+        preview = load_analyzer(args, sample_rate=args.sample)
+        if not preview.data:
+            print("❌ Nenhum resultado encontrado para análise!")
+            return
+        print(preview.generate_sample_preview())
+        if not args.full:
+            return
+        print("⏳ Continuando com a análise completa...")
+        analyzer = preview.full_analysis()
+    else:
+        analyzer = load_analyzer(args)
     
     if not analyzer.data:
         print("❌ Nenhum resultado encontrado para análise!")
@@ -513,6 +1141,12 @@ def main():
     # Exporta dados
     print("💾 Exportando dados...")
     analyzer.export_data(output_dir)
+    if args.export_dataset:
+        analyzer.export_dataset(Path(args.export_dataset))
+    if args.export_db:
+        analyzer.export_database(Path(args.export_db))
+    if args.export_matrices:
+        analyzer.export_outcome_matrices(Path(args.export_matrices))
     
     # Prepara dados de visualização
     print("📊 Preparando dados de visualização...")
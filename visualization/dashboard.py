@@ -8,24 +8,47 @@ de forma interativa usando Streamlit.
 
 import streamlit as st
 import pandas as pd
+import atexit
 import json
 import os
 from pathlib import Path
 from datetime import datetime
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 # Adiciona o diretório pai ao path para importar o analisador
 sys.path.append(str(Path(__file__).parent))
 from analyze_results import FlakyTestAnalyzer
+from metrics import FlakinessMetrics
+from results_store import SQLiteResultsStore
 
-def load_data(results_dir: str) -> tuple:
-    """Carrega e processa os dados."""
-    analyzer = FlakyTestAnalyzer(results_dir)
-    analyzer.scan_results()
+@st.cache_resource
+def get_background_executor() -> ThreadPoolExecutor:
+    """Uma única thread para a análise completa em segundo plano, encerrada junto com o processo."""
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='analise-completa')
+    atexit.register(executor.shutdown, wait=False, cancel_futures=True)
+    return executor
+
+def load_data(results_dir: str, from_dataset: bool = False, from_db: bool = False,
+              pool_commits: bool = False, sample_rate: float = None) -> tuple:
+    """Carrega e processa os dados (da árvore de resultados, de um dataset Parquet ou de um banco SQLite).
+    
+    Com ``sample_rate``, as métricas por teste usam só essa fração (por hash) dos testes.
+    """
+    analyzer = FlakyTestAnalyzer(results_dir, use_cache=not (from_dataset or from_db),
+                                 pool_commits=pool_commits, sample_rate=sample_rate)
+    if from_dataset:
+        analyzer.load_dataset(results_dir)
+    elif from_db:
+        analyzer.load_database(results_dir)
+    else:
+        analyzer.scan_results()
     
     if not analyzer.data:
         return pd.DataFrame(), analyzer
     
+    # Índice diário (somas acumuladas) construído uma vez e guardado junto do analisador em cache
+    analyzer.time_index
     df = pd.DataFrame(analyzer.data)
     # Converte timestamp para datetime
     df['datetime'] = pd.to_datetime(df['timestamp'], format='%Y-%m-%d_%H-%M-%S', errors='coerce')
@@ -102,24 +125,75 @@ def main():
     # Sidebar para configurações
     st.sidebar.header("⚙️ Configurações")
     
+    # Fonte dos dados: árvore de resultados, dataset Parquet ou banco SQLite exportados
+    source = st.sidebar.radio(
+        "Fonte dos Dados",
+        options=["Diretório de Resultados", "Dataset Parquet", "Banco SQLite"],
+        help="Gerados com: python visualization/main.py analyze --format parquet|sqlite"
+    )
+    from_dataset = source == "Dataset Parquet"
+    from_db = source == "Banco SQLite"
+    
     # Seleção do diretório de resultados
+    if from_db:
+        label, default_path = "Arquivo do Banco", "visualization/reports/flaky_tests.db"
+    elif from_dataset:
+        label, default_path = "Diretório do Dataset", "visualization/reports/dataset"
+    else:
+        label, default_path = "Diretório de Resultados", "results"
     results_dir = st.sidebar.text_input(
-        "Diretório de Resultados", 
-        value="results",
+        label, 
+        value=default_path,
         help="Caminho para o diretório contendo os resultados dos experimentos"
     )
     
+    pool_commits = st.sidebar.checkbox(
+        "Agrupar execuções do mesmo commit",
+        help="Soma as rodadas de todas as execuções pytest do commit mais recente (commit.txt)"
+    )
+    
+    sample_rate = None
+    if st.sidebar.checkbox(
+        "Prévia amostral",
+        help="Mostra métricas aproximadas de uma amostra dos testes enquanto a análise completa roda em segundo plano"
+    ):
+        sample_rate = st.sidebar.select_slider(
+            "Fração dos testes", options=[0.01, 0.05, 0.1, 0.25], value=0.1,
+            format_func=lambda rate: f"{rate:.0%}"
+        )
+    
     # Botão para carregar dados
     if st.sidebar.button("🔄 Carregar Dados"):
+        # Descarta a análise completa pendente antes de esquecer o executor
+        get_background_executor().shutdown(wait=False, cancel_futures=True)
         st.cache_data.clear()
+        st.cache_resource.clear()
     
     # Carrega os dados
     @st.cache_data
-    def get_data(results_dir):
-        return load_data(results_dir)
+    def get_data(results_dir, from_dataset, from_db, pool_commits, sample_rate=None):
+        return load_data(results_dir, from_dataset, from_db, pool_commits, sample_rate)
+    
+    # Análise completa em segundo plano, iniciada depois da prévia (que já preencheu o cache)
+    @st.cache_resource
+    def get_full_data(results_dir, from_dataset, from_db, pool_commits):
+        return get_background_executor().submit(
+            load_data, results_dir, from_dataset, from_db, pool_commits
+        )
     
     try:
-        df, analyzer = get_data(results_dir)
+        if sample_rate is None:
+            df, analyzer = get_data(results_dir, from_dataset, from_db, pool_commits)
+        else:
+            df, analyzer = get_data(results_dir, from_dataset, from_db, pool_commits, sample_rate)
+            full_data = get_full_data(results_dir, from_dataset, from_db, pool_commits)
+            if full_data.done():
+                df, analyzer = full_data.result()
+                st.success("✅ Análise completa concluída; exibindo métricas exatas.")
+            else:
+                st.info(f"🎲 Prévia com {sample_rate:.0%} dos testes: métricas por projeto aproximadas "
+                        "(± erro padrão). A análise completa continua em segundo plano.")
+                st.button("🔄 Verificar análise completa")
         
         if df.empty:
             st.error(f"❌ Nenhum resultado encontrado em '{results_dir}'")
@@ -138,6 +212,7 @@ def main():
         selected_tool = st.sidebar.selectbox("Ferramenta", tools)
         
         # Filtro por data
+        date_range = ()
         if 'datetime' in df.columns and not df['datetime'].isna().all():
             date_range = st.sidebar.date_input(
                 "Período",
@@ -146,6 +221,16 @@ def main():
                 max_value=df['datetime'].max().date()
             )
         
+        # Nível de significância: reclassifica os testes a partir das contagens, sem reprocessar
+        significance_level = st.sidebar.select_slider(
+            "Nível de significância (α)",
+            options=[0.001, 0.01, 0.05, 0.10],
+            value=FlakinessMetrics.SIGNIFICANCE_LEVEL,
+            help="Limiar do p-valor para considerar um teste flaky"
+        )
+        # Always: the analyzer may be shared between reruns (background full analysis)
+        analyzer.reclassify(significance_level)
+        
         # Aplica filtros
         filtered_df = df.copy()
         
@@ -163,28 +248,44 @@ def main():
                     (filtered_df['datetime'].dt.date <= end_date)
                 ]
         
+        # Sem recorte de período, o Top 20 vem dos sketches mantidos na ingestão
+        full_period = len(date_range) != 2 or tuple(date_range) == (
+            df['datetime'].min().date(), df['datetime'].max().date()
+        )
+        
+        # Totais do período via índice diário de somas acumuladas (sem reprocessar as execuções)
+        start_date, end_date = tuple(date_range) if len(date_range) == 2 else (None, None)
+        index_filters = {
+            'start': start_date,
+            'end': end_date,
+            'projects': None if selected_project == 'Todos' else [selected_project],
+            'tools': None if selected_tool == 'Todas' else [selected_tool]
+        }
+        period_totals = analyzer.time_index.totals(**index_filters)
+        
         # Métricas principais
         st.header("📊 Métricas Gerais")
         
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
+            total_runs = int(period_totals['runs'].sum())
             st.metric(
                 "Total de Execuções",
-                len(filtered_df),
-                delta=len(filtered_df) - len(df) if selected_project != 'Todos' or selected_tool != 'Todas' else None
+                total_runs,
+                delta=total_runs - len(df) if selected_project != 'Todos' or selected_tool != 'Todas' else None
             )
         
         with col2:
-            total_flaky = filtered_df['total_flaky'].sum()
+            total_flaky = int(period_totals['total_flaky'].sum())
             st.metric("Testes Flaky Detectados", total_flaky)
         
         with col3:
-            avg_errors = filtered_df['error_lines'].mean()
+            avg_errors = period_totals['error_lines'].sum() / total_runs if total_runs else float('nan')
             st.metric("Média de Erros", f"{avg_errors:.1f}")
         
         with col4:
-            projects_count = filtered_df['project'].nunique()
+            projects_count = period_totals.index.get_level_values('project').nunique()
             st.metric("Projetos Analisados", projects_count)
         
         # Gráficos principais
@@ -208,7 +309,7 @@ def main():
             
             # Also add any projects from DataFrame that aren't in project_metrics
             # (e.g., older runs or projects without detailed metrics)
-            df_flaky_by_project = filtered_df.groupby('project')['total_flaky'].sum()
+            df_flaky_by_project = period_totals.groupby(level='project')['total_flaky'].sum()
             for project, count in df_flaky_by_project.items():
                 if count > 0 and project not in flaky_counts:
                     # Only add if not already in flaky_counts from metrics
@@ -244,21 +345,15 @@ def main():
         with col2:
             # Média de erros por ferramenta
             st.subheader("Média de Erros por Ferramenta")
-            error_by_tool = filtered_df.groupby('tool')['error_lines'].mean()
+            tool_totals = period_totals.groupby(level='tool')[['error_lines', 'runs']].sum()
+            error_by_tool = (tool_totals['error_lines'] / tool_totals['runs']).rename('error_lines')
             st.bar_chart(error_by_tool)
         
-        # Timeline (se houver dados de tempo)
-        if 'datetime' in filtered_df.columns and not filtered_df['datetime'].isna().all():
+        # Timeline (se houver dados de tempo): testes flaky por dia, a partir do índice diário
+        timeline_pivot = analyzer.time_index.timeline(**index_filters)
+        if not timeline_pivot.empty:
             st.subheader("⏰ Evolução Temporal")
             
-            # Prepara dados para line chart
-            timeline_pivot = filtered_df.pivot_table(
-                index='datetime',
-                columns='project',
-                values='total_flaky',
-                aggfunc='sum'
-            ).fillna(0)
-            
             # Check if there's a large variance in values
             max_vals = timeline_pivot.max()
             max_overall = max_vals.max()
@@ -338,6 +433,7 @@ def main():
                 # Build metrics dataframe
                 metrics_data = []
                 for project, metrics in analyzer.project_metrics.items():
+                    standard_errors = metrics.get('standard_errors', {})
                     metrics_data.append({
                         'Projeto': project,
                         'Total de Testes': metrics['total_tests'],
@@ -349,6 +445,11 @@ def main():
                         'Severidade Média': metrics['severity_distribution'].get('medium', 0),
                         'Severidade Baixa': metrics['severity_distribution'].get('low', 0)
                     })
+                    if analyzer.sample_rate is not None:
+                        metrics_data[-1].update({
+                            '± Testes Flaky': round(standard_errors.get('flaky_tests', 0.0), 1),
+                            '± Taxa de Flakiness (p.p.)': round(standard_errors.get('flaky_percentage', 0.0), 2)
+                        })
                 
                 if metrics_data:
                     metrics_df = pd.DataFrame(metrics_data)
@@ -382,27 +483,28 @@ def main():
                 st.subheader("🔬 Análise Detalhada de Testes Flaky")
                 
                 # Collect all flaky tests across projects
-                all_flaky_metrics = []
-                for project, tests in analyzer.test_metrics.items():
-                    for test_name, metrics in tests.items():
-                        if metrics.is_flaky:
-                            all_flaky_metrics.append({
-                                'Projeto': project,
-                                'Teste': test_name[:80] + '...' if len(test_name) > 80 else test_name,
-                                'Taxa de Falha': f"{metrics.failure_rate:.1%}",
-                                'Severidade': metrics.flakiness_severity,
-                                'Execuções': metrics.total_runs,
-                                'Falhas': metrics.failures,
-                                'P-Value': f"{metrics.p_value:.4f}",
-                                'IC 95% Inferior': f"{metrics.confidence_interval_95[0]:.3f}",
-                                'IC 95% Superior': f"{metrics.confidence_interval_95[1]:.3f}"
-                            })
+                flaky_frames = [
+                    metrics[metrics['is_flaky']].assign(project=project)
+                    for project, metrics in analyzer.test_metrics.items()
+                ]
+                flaky_metrics = pd.concat(flaky_frames, ignore_index=True)
                 
-                if all_flaky_metrics:
-                    flaky_metrics_df = pd.DataFrame(all_flaky_metrics)
+                if not flaky_metrics.empty:
+                    test_names = flaky_metrics['test_name']
+                    flaky_metrics_df = pd.DataFrame({
+                        'Projeto': flaky_metrics['project'],
+                        'Teste': test_names.where(test_names.str.len() <= 80, test_names.str[:80] + '...'),
+                        'Taxa de Falha': flaky_metrics['failure_rate'].map('{:.1%}'.format),
+                        'Severidade': flaky_metrics['severity'].astype(str),
+                        'Execuções': flaky_metrics['total_runs'],
+                        'Falhas': flaky_metrics['failures'],
+                        'P-Value': flaky_metrics['p_value'].map('{:.4f}'.format),
+                        'IC 95% Inferior': flaky_metrics['ci_lower'].map('{:.3f}'.format),
+                        'IC 95% Superior': flaky_metrics['ci_upper'].map('{:.3f}'.format)
+                    })
                     
                     st.markdown(f"""
-                    📊 **Métricas estatísticas detalhadas disponíveis para {len(set(m['Projeto'] for m in all_flaky_metrics))} projeto(s) Python.**
+                    📊 **Métricas estatísticas detalhadas disponíveis para {flaky_metrics_df['Projeto'].nunique()} projeto(s) Python.**
                     
                     Estas métricas incluem análise por rodada individual com:
                     - Taxa de falha calculada de múltiplas execuções
@@ -415,7 +517,7 @@ def main():
                     tab1, tab2, tab3 = st.tabs(["📋 Todos os Testes", "⚠️ Alta Severidade", "📊 Estatísticas"])
                     
                     with tab1:
-                        st.markdown(f"**Total de testes flaky detectados: {len(all_flaky_metrics)}**")
+                        st.markdown(f"**Total de testes flaky detectados: {len(flaky_metrics_df)}**")
                         st.dataframe(
                             flaky_metrics_df.sort_values('Taxa de Falha', ascending=False),
                             use_container_width=True,
@@ -423,14 +525,13 @@ def main():
                         )
                     
                     with tab2:
-                        high_severity = [m for m in all_flaky_metrics if m['Severidade'] == 'high']
-                        if high_severity:
-                            st.markdown(f"**Testes com alta severidade: {len(high_severity)}**")
+                        high_severity_df = flaky_metrics_df[flaky_metrics_df['Severidade'] == 'high']
+                        if not high_severity_df.empty:
+                            st.markdown(f"**Testes com alta severidade: {len(high_severity_df)}**")
                             st.warning("""
                             ⚠️ Estes testes falham entre 40-60% das execuções, indicando instabilidade crítica.
                             Requerem atenção imediata!
                             """)
-                            high_severity_df = pd.DataFrame(high_severity)
                             st.dataframe(high_severity_df, use_container_width=True)
                         else:
                             st.success("✅ Nenhum teste com alta severidade detectado!")
@@ -443,7 +544,7 @@ def main():
                         """)
                         
                         # Create histogram of failure rates
-                        failure_rates = [float(m['Taxa de Falha'].rstrip('%')) / 100 for m in all_flaky_metrics]
+                        failure_rates = flaky_metrics['failure_rate'].to_numpy()
                         import numpy as np
                         
                         bins = [0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
@@ -558,19 +659,33 @@ def main():
         )
         
         # Análise de testes flaky específicos
+        if from_db:
+            # Com o banco SQLite, contagens e ocorrências vêm de consultas indexadas
+            store = SQLiteResultsStore(results_dir)
+            since, until = (str(d) for d in date_range) if len(date_range) == 2 else (None, None)
+            store_filters = {
+                'project': None if selected_project == 'Todos' else selected_project,
+                'tool': None if selected_tool == 'Todas' else selected_tool,
+                'since': since,
+                'until': until
+            }
+        
         if 'flaky_tests' in filtered_df.columns:
             st.header("🎯 Análise de Testes Flaky Específicos")
             
-            # Coleta todos os testes flaky
-            all_flaky_tests = []
-            for _, row in filtered_df.iterrows():
-                if row['flaky_tests']:
-                    all_flaky_tests.extend(row['flaky_tests'])
+            if from_db:
+                flaky_counts = store.top_flaky_tests(limit=20, **store_filters)
+            elif full_period:
+                flaky_counts = analyzer.top_flaky_tests(
+                    project=None if selected_project == 'Todos' else selected_project,
+                    tools=None if selected_tool == 'Todas' else [selected_tool],
+                    limit=20
+                )
+            else:
+                # Período recortado: contagens por teste do índice diário
+                flaky_counts = analyzer.time_index.top_tests(limit=20, **index_filters)
             
-            if all_flaky_tests:
-                # Top testes flaky
-                flaky_counts = pd.Series(all_flaky_tests).value_counts().head(20)
-                
+            if not flaky_counts.empty:
                 st.subheader("Top 20 Testes Flaky Mais Frequentes")
                 # Cria DataFrame para melhor visualização
                 flaky_df = pd.DataFrame({
@@ -587,20 +702,37 @@ def main():
                 for test_name, count in top_5_flaky.items():
                     with st.expander(f"🐛 {test_name} ({count} ocorrências)"):
                         # Mostra em quais execuções este teste apareceu
-                        test_occurrences = []
-                        for _, row in filtered_df.iterrows():
-                            if test_name in row.get('flaky_tests', []):
-                                test_occurrences.append({
-                                    'projeto': row['project'],
-                                    'ferramenta': row['tool'],
-                                    'execução': row['timestamp']
-                                })
+                        if from_db:
+                            occurrence_df = store.runs_with_failures(test_name, project=store_filters['project'])
+                        else:
+                            test_occurrences = []
+                            for _, row in filtered_df.iterrows():
+                                if test_name in row.get('flaky_tests', []):
+                                    test_occurrences.append({
+                                        'projeto': row['project'],
+                                        'ferramenta': row['tool'],
+                                        'execução': row['timestamp']
+                                    })
+                            occurrence_df = pd.DataFrame(test_occurrences)
                         
-                        if test_occurrences:
+                        if not occurrence_df.empty:
                             st.write("**Ocorrências:**")
-                            occurrence_df = pd.DataFrame(test_occurrences)
                             st.dataframe(occurrence_df, use_container_width=True)
         
+        if from_db:
+            with st.expander("🔎 Consulta por Teste"):
+                test_query = st.text_input("Nome do teste (ex.: tests/test_cli.py::test_download)")
+                if test_query:
+                    occurrence_df = store.runs_with_failures(test_query, project=store_filters['project'])
+                    if occurrence_df.empty:
+                        st.info("Nenhuma execução com falha deste teste.")
+                    else:
+                        st.dataframe(occurrence_df, use_container_width=True)
+                
+                st.write("**Testes flaky no período selecionado:**")
+                st.dataframe(store.flaky_tests(**store_filters), use_container_width=True)
+            store.close()
+        
         # Estatísticas por ferramenta
         st.header("🔧 Comparação de Ferramentas")
         
@@ -622,6 +754,34 @@ def main():
         
         st.dataframe(tool_stats, use_container_width=True)
         
+        # Estabilidade entre execuções (Jaccard das detecções, execução × execução)
+        stability = [
+            (project, tool, matrix)
+            for project, tools in analyzer.run_stability.items()
+            for tool, matrix in tools.items()
+            if (selected_project in ('Todos', project)) and (selected_tool in ('Todas', tool))
+        ]
+        if stability:
+            st.header("🔁 Estabilidade entre Execuções")
+            st.markdown("Similaridade de Jaccard entre os testes detectados em cada par de execuções "
+                        "(1 = mesmas detecções; valores baixos indicam resultados pouco reprodutíveis).")
+            
+            import plotly.express as px
+            visible_runs = set(filtered_df['timestamp'])
+            for project, tool, matrix in stability:
+                runs = [run for run in matrix.index if run in visible_runs]
+                if len(runs) < 2:
+                    continue
+                fig = px.imshow(
+                    matrix.loc[runs, runs],
+                    zmin=0, zmax=1,
+                    color_continuous_scale='RdYlGn',
+                    labels={'x': 'Execução', 'y': 'Execução', 'color': 'Jaccard'},
+                    title=f"{project} / {tool}"
+                )
+                fig.update_layout(height=max(300, 40 * len(runs)))
+                st.plotly_chart(fig, use_container_width=True)
+        
         # Download dos dados
         st.header("💾 Download dos Dados")
         
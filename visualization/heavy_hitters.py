@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Bounded-memory top-N counting of flaky-test detections.
+
+Every run of a detection tool reports a list of flaky tests; the reports ask
+for the tests reported most often. Instead of concatenating every report
+into one list and calling ``value_counts``, each project/tool keeps a
+``SpaceSavingSketch``: at most ``capacity`` counters, updated as runs are
+ingested, whose top entries are the most frequent tests however many runs
+have piled up. Sketches of different tools or projects are combined with
+``merge``.
+
+The sketches are kept alongside the results (``SKETCHES_FILENAME``) with
+the runs they have counted, so a later scan only folds in the new runs.
+
+Counts are exact while a sketch has seen no more than ``capacity`` distinct
+tests; past that, each count overestimates the true one by at most the
+``error`` recorded for it (and by at most N / capacity, N being the number
+of occurrences counted).
+"""
+
+import heapq
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+SKETCHES_FILENAME = '.flaky_sketches.json'
+
+
+class SpaceSavingSketch:
+    """
+    Space-Saving heavy-hitter counter (Metwally et al., 2005).
+
+    Counters are kept in first-seen order, so ties in ``top`` come out in
+    the order the tests were first reported, as with ``value_counts`` over
+    the full list. Once the sketch is full, the smallest counter is found
+    through a lazily updated min-heap of (count, first-seen position, item):
+    an increment pushes a fresh entry and outdated ones are skipped when
+    popped, so an eviction costs O(log capacity) amortized.
+    """
+
+    DEFAULT_CAPACITY = 1000
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self.total = 0  # occurrences counted, including evicted ones
+        self._counts: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._order: Dict[str, int] = {}  # item -> first-seen position, the heap's tie-breaker
+        self._next = 0
+        self._heap: Optional[List[Tuple[int, int, str]]] = None  # built on the first eviction
+        self._unmonitored = 0  # upper bound on the count of an item without a counter
+
+    def add(self, item: str, count: int = 1) -> None:
+        """Count ``count`` more occurrences of ``item``."""
+        self.total += count
+        if item in self._counts:
+            self._counts[item] += count
+            self._push(item)
+            return
+
+        # Occurrences of an unmonitored item may have gone uncounted (0 until something was evicted)
+        error = self._unmonitored
+        if len(self._counts) >= self.capacity:
+            # Replace the smallest counter; its count becomes the new item's error
+            evicted = self._pop_min()
+            error = max(error, self._counts.pop(evicted))
+            del self._errors[evicted]
+            del self._order[evicted]
+            self._unmonitored = error
+        self._insert(item, error + count, error)
+
+    def _insert(self, item: str, count: int, error: int) -> None:
+        self._counts[item] = count
+        self._errors[item] = error
+        self._order[item] = self._next
+        self._next += 1
+        self._push(item)
+
+    def _push(self, item: str) -> None:
+        if self._heap is None:
+            return
+        heapq.heappush(self._heap, (self._counts[item], self._order[item], item))
+        # Outdated entries pile up with the increments; start over past 2x the live ones
+        if len(self._heap) > 2 * self.capacity:
+            self._heap = None
+
+    def _pop_min(self) -> str:
+        """Smallest counter (earliest first-seen among equals), removed from the heap."""
+        if self._heap is None:
+            self._heap = [(count, self._order[item], item) for item, count in self._counts.items()]
+            heapq.heapify(self._heap)
+        while True:
+            count, order, item = heapq.heappop(self._heap)
+            if self._counts.get(item) == count and self._order[item] == order:
+                return item
+
+    def update(self, items: Iterable[str]) -> None:
+        """Count one occurrence of each item (e.g. the flaky tests of a run)."""
+        for item in items:
+            self.add(item)
+
+    def merge(self, other: 'SpaceSavingSketch') -> 'SpaceSavingSketch':
+        """
+        Add the counters of another sketch to this one (returns self).
+
+        Counts of common items are summed. An item missing from one of the
+        sketches may still have occurred up to the largest count that sketch
+        evicted, which is added to the item's count and error; then only the
+        ``capacity`` largest counters are kept, which preserves the
+        N / capacity error bound. Sketches that never evicted add nothing, so
+        merging exact sketches stays exact until the capacity is exceeded.
+        """
+        floor, other_floor = self._unmonitored, other._unmonitored
+        if other_floor:
+            for item in self._counts:
+                if item not in other._counts:
+                    self._counts[item] += other_floor
+                    self._errors[item] += other_floor
+        for item, count in other._counts.items():
+            if item in self._counts:
+                self._counts[item] += count
+                self._errors[item] += other._errors[item]
+            else:
+                self._insert(item, count + floor, other._errors[item] + floor)
+        self.total += other.total
+        self._unmonitored = floor + other_floor
+
+        if len(self._counts) > self.capacity:
+            ranked = self._ranked()
+            self._unmonitored = max(self._unmonitored, ranked[self.capacity][1])
+            kept = set(item for item, _ in ranked[:self.capacity])
+            self._counts = {item: c for item, c in self._counts.items() if item in kept}
+            self._errors = {item: e for item, e in self._errors.items() if item in kept}
+            self._order = {item: o for item, o in self._order.items() if item in kept}
+        self._heap = None
+        return self
+
+    @classmethod
+    def merged(cls, sketches: Iterable['SpaceSavingSketch'],
+               capacity: Optional[int] = None) -> 'SpaceSavingSketch':
+        """A new sketch holding the merge of ``sketches``."""
+        sketches = list(sketches)
+        if capacity is None:
+            capacity = max((s.capacity for s in sketches), default=cls.DEFAULT_CAPACITY)
+        result = cls(capacity)
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
+
+    def _ranked(self) -> List[Tuple[str, int]]:
+        # sorted() is stable: equal counts keep their first-seen order
+        return sorted(self._counts.items(), key=lambda entry: -entry[1])
+
+    def top(self, n: int) -> pd.Series:
+        """The ``n`` most frequent items and their counts, like ``value_counts().head(n)``."""
+        ranked = self._ranked()[:n]
+        return pd.Series([count for _, count in ranked],
+                         index=pd.Index([item for item, _ in ranked], dtype=object),
+                         dtype='int64', name='count')
+
+    def error(self, item: str) -> int:
+        """Maximum overestimate of ``item``'s count (0 while the sketch is exact)."""
+        return self._errors.get(item, 0)
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, item: str) -> bool:
+        return item in self._counts
+
+    def to_dict(self) -> Dict:
+        return {
+            'capacity': self.capacity,
+            'total': self.total,
+            'unmonitored': self._unmonitored,
+            'counters': [[item, count, self._errors[item]] for item, count in self._counts.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SpaceSavingSketch':
+        sketch = cls(data['capacity'])
+        sketch.total = data['total']
+        sketch._unmonitored = data['unmonitored']
+        for item, count, error in data['counters']:
+            sketch._insert(item, count, error)
+        return sketch
+
+
+def save_sketches(sketches: Dict[str, Dict[str, SpaceSavingSketch]], path: Path,
+                  counted_runs: Iterable[str] = ()) -> None:
+    """Write project -> tool -> sketch as JSON (atomically), with the keys of the runs they counted."""
+    data = {
+        'counted_runs': sorted(counted_runs),
+        'sketches': {
+            project: {tool: sketch.to_dict() for tool, sketch in tools.items()}
+            for project, tools in sketches.items()
+        }
+    }
+    tmp_path = Path(path).with_name(Path(path).name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_sketches(path: Path) -> Tuple[Dict[str, Dict[str, SpaceSavingSketch]], Set[str]]:
+    """Read sketches written by ``save_sketches`` and the keys of the runs they counted."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    sketches = {
+        project: {tool: SpaceSavingSketch.from_dict(sketch) for tool, sketch in tools.items()}
+        for project, tools in data['sketches'].items()
+    }
+    return sketches, set(data['counted_runs'])
@@ -10,11 +10,16 @@ from datetime import datetime
 from typing import Dict, List
 import pandas as pd
 from analyze_results import FlakyTestAnalyzer
+from results_store import SQLiteResultsStore
 
 class HTMLReportGenerator:
     def __init__(self):
         self.template_dir = Path(__file__).parent / "templates"
         self.template_dir.mkdir(exist_ok=True)
+        # Banco SQLite consultado diretamente quando o relatório vem de --from-db
+        self.store = None
+        # Analisador da árvore carregada (sketches dos testes flaky mais frequentes)
+        self.analyzer = None
         
     def create_html_template(self) -> str:
         """Cria template HTML responsivo e elegante."""
@@ -319,17 +324,16 @@ class HTMLReportGenerator:
     
     def _generate_flaky_tests_summary(self, project_data: pd.DataFrame) -> str:
         """Gera resumo dos testes flaky mais problemáticos."""
-        all_flaky_tests = []
-        for _, row in project_data.iterrows():
-            if row.get('flaky_tests'):
-                all_flaky_tests.extend(row['flaky_tests'])
-        
-        if not all_flaky_tests:
+        if self.store is not None:
+            # Top 5 testes mais problemáticos, contados pelo próprio banco
+            flaky_counts = self.store.top_flaky_tests(project=project_data['project'].iloc[0], limit=5)
+        else:
+            # Contagens mantidas em memória constante desde a ingestão das execuções
+            flaky_counts = self.analyzer.top_flaky_tests(project=project_data['project'].iloc[0], limit=5)
+        
+        if flaky_counts.empty:
             return '<div class="alert alert-info">✅ Nenhum teste flaky específico identificado.</div>'
         
-        # Top 5 testes mais problemáticos
-        flaky_counts = pd.Series(all_flaky_tests).value_counts().head(5)
-        
         table_rows = []
         for test_name, count in flaky_counts.items():
             # Encurta nomes muito longos
@@ -489,27 +493,47 @@ class HTMLReportGenerator:
         </script>
         '''
     
-    def generate_full_report(self, results_dir: str, output_path: str) -> None:
-        """Gera relatório HTML completo."""
+    def generate_full_report(self, results_dir: str, output_path: str,
+                             dataset_dir: str = None, db_path: str = None) -> None:
+        """Gera relatório HTML completo.
+        
+        Args:
+            results_dir: Árvore de resultados dos experimentos
+            output_path: Arquivo HTML de saída
+            dataset_dir: Dataset Parquet a ser usado no lugar de ``results_dir``
+            db_path: Banco SQLite a ser usado no lugar de ``results_dir``
+        """
         print("📊 Gerando relatório HTML...")
         
         # Carrega e processa dados
-        analyzer = FlakyTestAnalyzer(results_dir)
-        analyzer.scan_results()
+        analyzer = FlakyTestAnalyzer(results_dir, use_cache=not (dataset_dir or db_path))
+        if dataset_dir:
+            analyzer.load_dataset(dataset_dir)
+        elif db_path:
+            analyzer.load_database(db_path)
+            self.store = SQLiteResultsStore(db_path)
+        else:
+            analyzer.scan_results()
         
         if not analyzer.data:
             print("❌ Nenhum dado encontrado para gerar relatório")
             return
         
+        self.analyzer = analyzer
         df = pd.DataFrame(analyzer.data)
         output_path = Path(output_path)
         output_dir = output_path.parent
         output_dir.mkdir(parents=True, exist_ok=True)
         
         # Gera conteúdo das seções
-        summary_section = self.generate_summary_section(df)
-        project_analysis = self.generate_project_analysis(df)
-        charts_section = self.generate_charts_section(df, output_dir)
+        try:
+            summary_section = self.generate_summary_section(df)
+            project_analysis = self.generate_project_analysis(df)
+            charts_section = self.generate_charts_section(df, output_dir)
+        finally:
+            if self.store is not None:
+                self.store.close()
+                self.store = None
         
         # Monta conteúdo completo
         content = f'''
@@ -541,11 +565,16 @@ def main():
                        help='Diretório com resultados dos experimentos')
     parser.add_argument('--output', default='visualization/reports/flaky_tests_report.html',
                        help='Arquivo de saída do relatório HTML')
+    parser.add_argument('--from-dataset',
+                       help='Carrega as execuções de um dataset Parquet em vez de --results-dir')
+    parser.add_argument('--from-db',
+                       help='Consulta um banco SQLite em vez de --results-dir')
     
     args = parser.parse_args()
     
     generator = HTMLReportGenerator()
-    generator.generate_full_report(args.results_dir, args.output)
+    generator.generate_full_report(args.results_dir, args.output, dataset_dir=args.from_dataset,
+                                   db_path=args.from_db)
 
 if __name__ == "__main__":
     main()
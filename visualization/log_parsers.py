@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Streaming parsers for the logs produced by the detection tools.
+
+Logs are read line by line (transparently decompressing ``.gz`` files), so
+memory use stays flat no matter how large a NonDex log grows. Summary lines
+that tools print at the end of a run are found by reading the file backwards
+from its end, a block at a time, and stopping at the first match.
+
+Each detection tool is handled by a ``ToolLogParser`` registered with
+``register_log_parser``; the analyzer looks parsers up by tool directory name
+and never branches on the tool itself.
+"""
+
+import gzip
+import os
+import re
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+@dataclass(frozen=True)
+class LineMatcher:
+    """
+    A precompiled regex guarded by a cheap literal prefilter.
+
+    The literal check (``str.startswith`` or ``in``) rejects almost every line
+    of a large log before the regex engine is involved. With ``prefix`` the
+    regex is anchored at the start of the line (``match``), otherwise it is
+    searched anywhere in it.
+    """
+    pattern: 're.Pattern[str]'
+    prefix: Optional[str] = None
+    substring: Optional[str] = None
+
+    def match(self, line: str) -> Optional['re.Match[str]']:
+        if self.prefix is not None:
+            if not line.startswith(self.prefix):
+                return None
+            return self.pattern.match(line)
+        if self.substring is not None and self.substring not in line:
+            return None
+        return self.pattern.search(line)
+
+
+# Padrão típico do NonDex: [WARNING] org.package.ClassName#testMethod
+NONDEX_FLAKY_MATCHER = LineMatcher(re.compile(r'\[WARNING\]\s+(\S+#\S+)'), prefix='[WARNING]')
+
+# Maven summary: "[WARNING] Tests run: 18549, Failures: 0, Errors: 0, Skipped: 20"
+MAVEN_SUMMARY_MATCHER = LineMatcher(re.compile(r'\[(?:WARNING|INFO)\]\s+Tests run:\s+(\d+)'),
+                                    substring='Tests run:')
+TESTS_RUN_MATCHER = LineMatcher(re.compile(r'Tests run:\s+(\d+)'), substring='Tests run:')
+RESULTS_HEADER = 'Results:'
+
+# Lines after a "Results:" header searched for an unprefixed test count
+RESULTS_WINDOW = 9
+
+# Pytest summary: "2 failed, 1017 passed, 5 skipped, 4 xfailed, 143 warnings in 125.07s"
+PYTEST_SUMMARY_MATCHER = LineMatcher(re.compile(r'in\s+[\d.]+s'), substring=' in ')
+PYTEST_COUNT_PATTERN = re.compile(r'(\d+)\s+(failed|passed|skipped|error|xfailed|xpassed)')
+
+# Bytes read per seek when scanning a log backwards
+TAIL_BLOCK_SIZE = 64 * 1024
+
+# Trailing lines of a gzip log kept for ``find_last`` (summaries are near the end)
+GZIP_TAIL_LINES = 10_000
+
+
+def open_log(log_file: Path) -> IO[str]:
+    """Open a tool log for text reading, decompressing gzip logs on the fly."""
+    log_file = Path(log_file)
+    if log_file.suffix == '.gz':
+        return gzip.open(log_file, 'rt', encoding='utf-8', errors='replace')
+    return open(log_file, 'r', encoding='utf-8', errors='replace')
+
+
+def iter_log_lines(log_file: Path) -> Iterator[str]:
+    """Yield the lines of a (possibly gzip-compressed) log one at a time."""
+    with open_log(log_file) as f:
+        yield from f
+
+
+def iter_lines_reversed(log_file: Path, block_size: int = TAIL_BLOCK_SIZE) -> Iterator[str]:
+    """
+    Yield the lines of a plain-text log from last to first.
+
+    The file is read backwards in ``block_size`` chunks, so stopping after the
+    first few lines costs a single seek and read regardless of the log size.
+    """
+    with open(log_file, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b''
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + remainder).split(b'\n')
+            # The first piece may continue in the previous block
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                yield line.decode('utf-8', errors='replace').rstrip('\r')
+        yield remainder.decode('utf-8', errors='replace').rstrip('\r')
+
+
+def find_last(log_file: Path, parse_line: Callable[[Iterator[str]], Optional[T]],
+              tail_lines: int = GZIP_TAIL_LINES) -> Optional[T]:
+    """
+    Return the value parsed from the last matching line of a log.
+
+    ``parse_line`` receives the reversed line iterator and returns the first
+    value it finds (or None). Gzip logs cannot be seeked backwards cheaply, so
+    they are streamed forwards keeping only the last ``tail_lines`` lines,
+    which are parsed once at the end: a summary further from the end of a
+    gzip log is not found.
+    """
+    log_file = Path(log_file)
+    if log_file.suffix != '.gz':
+        return parse_line(iter_lines_reversed(log_file))
+
+    tail = deque((line.rstrip('\r\n') for line in iter_log_lines(log_file)), maxlen=tail_lines)
+    return parse_line(reversed(tail))
+
+
+def parse_pytest_total(lines: Iterator[str]) -> Optional[int]:
+    """Total tests from the first pytest summary line (e.g. "1 failed, 476 passed in 1.52s")."""
+    for line in lines:
+        if not PYTEST_SUMMARY_MATCHER.match(line):
+            continue
+        total = sum(int(match.group(1)) for match in PYTEST_COUNT_PATTERN.finditer(line))
+        if total > 0:
+            return total
+    return None
+
+
+def parse_maven_total(lines: Iterator[str]) -> Optional[int]:
+    """
+    Total tests from the first Maven ``Tests run:`` summary in reversed lines.
+
+    Either a ``[INFO|WARNING] Tests run:`` line, or the first ``Tests run:``
+    found within RESULTS_WINDOW lines after a ``Results:`` header.
+    """
+    following = deque(maxlen=RESULTS_WINDOW)  # nearest following line first
+    for line in lines:
+        match = MAVEN_SUMMARY_MATCHER.match(line)
+        if match:
+            return int(match.group(1))
+
+        if RESULTS_HEADER in line:
+            for next_line in following:
+                match = TESTS_RUN_MATCHER.match(next_line)
+                if match:
+                    return int(match.group(1))
+
+        following.appendleft(line)
+    return None
+
+
+def tail_pytest_total(log_file: Path) -> Optional[int]:
+    """Total tests reported by the final pytest summary line of ``run_N.log``."""
+    return find_last(log_file, parse_pytest_total)
+
+
+def tail_maven_total(log_file: Path) -> Optional[int]:
+    """Total tests reported by the last Maven ``Tests run:`` summary of a log."""
+    return find_last(log_file, parse_maven_total)
+
+
+def scan_nondex_log(log_file: Path) -> Tuple[List[str], Optional[int]]:
+    """
+    Extract flaky tests and the total test count from a NonDex log in one pass.
+
+    Args:
+        log_file: Path to ``nondex.log`` (or ``nondex.log.gz``)
+
+    Returns:
+        Tuple of (unique ``class#method`` ids in order of first appearance,
+        total tests from the last Maven ``Tests run:`` summary or None)
+    """
+    flaky_tests = {}  # insertion-ordered set
+
+    # The count reported last in the log wins: either a prefixed
+    # "[INFO|WARNING] Tests run:" line, or the first "Tests run:" found
+    # within RESULTS_WINDOW lines of a "Results:" header.
+    total_tests = None
+    results_window = 0
+
+    for line in iter_log_lines(log_file):
+        match = NONDEX_FLAKY_MATCHER.match(line)
+        if match:
+            flaky_tests.setdefault(match.group(1), None)
+
+        if results_window:
+            results_window -= 1
+            match = TESTS_RUN_MATCHER.match(line)
+            if match:
+                total_tests = int(match.group(1))
+                results_window = 0
+
+        match = MAVEN_SUMMARY_MATCHER.match(line)
+        if match:
+            total_tests = int(match.group(1))
+
+        if RESULTS_HEADER in line:
+            results_window = RESULTS_WINDOW
+
+    return list(flaky_tests), total_tests
+
+
+# ---------------------------------------------------------------------------
+# Tool parser registry
+# ---------------------------------------------------------------------------
+
+LOG_PARSERS: Dict[str, 'ToolLogParser'] = {}
+
+
+def register_log_parser(parser_cls: type) -> type:
+    """Class decorator registering a ``ToolLogParser`` under its ``tool`` name."""
+    LOG_PARSERS[parser_cls.tool] = parser_cls()
+    return parser_cls
+
+
+def get_log_parser(tool: str) -> Optional['ToolLogParser']:
+    """Parser registered for a tool directory name (e.g. ``nondex``), if any."""
+    return LOG_PARSERS.get(tool)
+
+
+class ToolLogParser:
+    """
+    Base class for tool log parsers.
+
+    Subclasses declare ``flaky_matchers`` (whose first group is the test id)
+    and optionally ``parse_total`` (applied to the log's lines from last to
+    first); streaming, prefiltering and tail-seeking are handled here.
+    """
+
+    tool = ''
+    flaky_matchers: Tuple[LineMatcher, ...] = ()
+    parse_total: Optional[Callable[[Iterator[str]], Optional[int]]] = None
+
+    def find_log(self, run_dir: Path) -> Optional[Path]:
+        """Locate the tool log of a run, plain or gzip-compressed."""
+        for name in (f"{self.tool}.log", f"{self.tool}.log.gz"):
+            log_file = run_dir / name
+            if log_file.exists():
+                return log_file
+        return None
+
+    def extract_flaky_tests(self, log_file: Path) -> List[str]:
+        """Unique flaky test ids in order of first appearance."""
+        if not self.flaky_matchers:
+            return []
+
+        flaky_tests = {}  # insertion-ordered set
+        for line in iter_log_lines(log_file):
+            for matcher in self.flaky_matchers:
+                match = matcher.match(line)
+                if match:
+                    flaky_tests.setdefault(match.group(1), None)
+        return list(flaky_tests)
+
+    def extract_total_tests(self, log_file: Path) -> Optional[int]:
+        """Total tests from the last summary line of the log."""
+        if self.parse_total is None:
+            return None
+        return find_last(log_file, self.parse_total)
+
+    def scan(self, log_file: Path) -> Tuple[List[str], Optional[int]]:
+        """Flaky tests and total test count of one log."""
+        return self.extract_flaky_tests(log_file), self.extract_total_tests(log_file)
+
+    def parse_run(self, run_dir: Path) -> Dict:
+        """Fields contributed to the run record of ``run_dir`` (empty without a log)."""
+        log_file = self.find_log(run_dir)
+        if log_file is None:
+            return {}
+
+        flaky_tests, total_tests = self.scan(log_file)
+        return {
+            'flaky_tests': flaky_tests,
+            'total_flaky': len(flaky_tests),
+            'total_tests': total_tests
+        }
+
+    def parse_outcomes(self, outcomes) -> Dict:
+        """Fields derived from the run's OutcomeMatrix, applied over ``parse_run``'s (none by default)."""
+        return {}
+
+
+@register_log_parser
+class NonDexLogParser(ToolLogParser):
+    """NonDex (Maven plugin): ``[WARNING] class#method`` lines plus the Maven summary."""
+
+    tool = 'nondex'
+    flaky_matchers = (NONDEX_FLAKY_MATCHER,)
+    parse_total = staticmethod(parse_maven_total)
+
+    def scan(self, log_file: Path) -> Tuple[List[str], Optional[int]]:
+        # Flaky tests and test count come out of a single streaming pass
+        return scan_nondex_log(log_file)
+
+
+@register_log_parser
+class PytestRerunLogParser(ToolLogParser):
+    """pytest-rerun: one ``run_N.log`` per round, failures come from ``run_N.jsonl`` or ``runs.csv``."""
+
+    tool = 'pytest-rerun'
+    parse_total = staticmethod(parse_pytest_total)
+
+    def parse_run(self, run_dir: Path) -> Dict:
+        # Each round writes its own run_N.log; only their summary lines matter
+        totals = [self.extract_total_tests(round_log) for round_log in sorted(run_dir.glob('run_*.log*'))]
+        result = {'total_tests': max((t for t in totals if t), default=0)}
+        # Rounds recorded by the pytest_outcomes plugin list passing tests too
+        if any(run_dir.glob('run_*.jsonl')):
+            result['per_test_outcomes'] = True
+        return result
+
+
+@register_log_parser
+class PytestInProcessLogParser(ToolLogParser):
+    """
+    pytest-inprocess: every round ran in one pytest process (single ``pytest.log``).
+
+    Same ``run_N.jsonl``/``runs.csv`` files as pytest-rerun, kept under their
+    own tool name so state leaking between in-process rounds is not mixed
+    with process-per-round results. pytest.log sums every round, so the
+    run record comes from the outcome matrix instead (``parse_outcomes``);
+    the analyzer computes the per-test metrics of these runs from the same
+    matrix (``inprocess_metrics``).
+    """
+
+    tool = 'pytest-inprocess'
+
+    def parse_run(self, run_dir: Path) -> Dict:
+        if not any(run_dir.glob('run_*.jsonl')):
+            return {}
+        return {'per_test_outcomes': True}
+
+    def parse_outcomes(self, outcomes) -> Dict:
+        # Every reported test counts towards the suite size, skipped ones included;
+        # like the other detectors, the run lists the tests that both failed and passed
+        failures, runs = outcomes.failures_per_test(), outcomes.runs_per_test()
+        flaky_tests = [test for test, failed, ran in zip(outcomes.tests, failures, runs) if 0 < failed < ran]
+        return {
+            'flaky_tests': flaky_tests,
+            'total_flaky': len(flaky_tests),
+            'total_tests': outcomes.n_tests
+        }
+
+
+@register_log_parser
+class IDFlakiesLogParser(ToolLogParser):
+    """iDFlakies: registered so its runs are recognised; no output format is parsed yet."""
+
+    # Adaptar conforme o formato de saída do iDFlakies: declare flaky_matchers
+    # (e.g. a LineMatcher over its "flaky test" lines) and parse_total.
+    tool = 'idflakies'
@@ -11,6 +11,16 @@ import sys
 import argparse
 from pathlib import Path
 
+def sample_fraction(value: str) -> float:
+    """Tipo do argparse para --sample: uma fração em (0, 1]."""
+    try:
+        fraction = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fração inválida: {value!r}")
+    if not 0 < fraction <= 1:
+        raise argparse.ArgumentTypeError(f"a fração deve estar em (0, 1], recebido {value}")
+    return fraction
+
 def main():
     parser = argparse.ArgumentParser(
         description='Sistema de Análise de Testes Flaky',
@@ -24,6 +34,22 @@ Exemplos de uso:
   # Gerar apenas relatório HTML
   python main.py html-report --results-dir results
 
+  # Exportar dataset Parquet e reanalisar a partir dele
+  python main.py analyze --format parquet
+  python main.py analyze --from-dataset visualization/reports/dataset
+
+  # Gravar banco SQLite e consultá-lo
+  python main.py analyze --format sqlite
+  python main.py query --flaky --project httpie --since 7d
+  python main.py query --test "tests/test_cli.py::test_download"
+
+  # Planejar o número de rodadas (simulação de poder de detecção)
+  python main.py plan --rates 0.05,0.1,0.2 --rounds 10,20,50
+  python main.py plan --results-dir results
+
+  # Prévia com 10% dos testes (com --full, segue com a análise completa)
+  python main.py analyze --sample 0.1
+
   # Executar dashboard interativo
   python main.py dashboard
 
@@ -43,8 +69,22 @@ Para mais informações sobre cada comando, use:
                                help='Diretório com os resultados (default: results)')
     analyze_parser.add_argument('--output-dir', default='visualization/reports',
                                help='Diretório de saída (default: visualization/reports)')
-    analyze_parser.add_argument('--format', choices=['all', 'markdown', 'html', 'csv'], 
-                               default='all', help='Formato de saída (default: all)')
+    analyze_parser.add_argument('--format', choices=['all', 'markdown', 'html', 'csv', 'parquet', 'sqlite'], 
+                               default='all', help='Formato de saída (default: all; parquet exige pyarrow)')
+    analyze_parser.add_argument('--from-dataset',
+                               help='Carrega as execuções de um dataset Parquet em vez de --results-dir')
+    analyze_parser.add_argument('--from-db',
+                               help='Carrega as execuções de um banco SQLite em vez de --results-dir')
+    analyze_parser.add_argument('--no-cache', action='store_true',
+                               help='Reprocessa todas as execuções ignorando o cache de resultados')
+    analyze_parser.add_argument('--pool-commit', action='store_true',
+                               help='Agrupa as métricas de todas as execuções pytest do mesmo commit')
+    analyze_parser.add_argument('--jobs', type=int, default=1,
+                               help='Processos paralelos para processar as execuções (0 = todos os núcleos, default: 1)')
+    analyze_parser.add_argument('--sample', type=sample_fraction, metavar='FRAÇÃO',
+                               help='Mostra só uma prévia aproximada com esta fração dos testes (ex.: 0.1)')
+    analyze_parser.add_argument('--full', action='store_true',
+                               help='Com --sample, segue com a análise completa depois da prévia')
     
     # Comando: html-report  
     html_parser = subparsers.add_parser('html-report', help='Gera relatório HTML elegante')
@@ -52,6 +92,38 @@ Para mais informações sobre cada comando, use:
                             help='Diretório com os resultados (default: results)')
     html_parser.add_argument('--output', default='visualization/reports/report.html',
                             help='Arquivo de saída HTML (default: visualization/reports/report.html)')
+    html_parser.add_argument('--from-dataset',
+                            help='Carrega as execuções de um dataset Parquet em vez de --results-dir')
+    html_parser.add_argument('--from-db',
+                            help='Consulta um banco SQLite em vez de --results-dir')
+    
+    # Comando: query
+    query_parser = subparsers.add_parser('query', help='Consulta o banco SQLite de resultados')
+    query_parser.add_argument('--db', default='visualization/reports/flaky_tests.db',
+                             help='Banco SQLite (default: visualization/reports/flaky_tests.db)')
+    query_parser.add_argument('--project', help='Filtra por projeto')
+    query_parser.add_argument('--tool', help='Filtra por ferramenta')
+    query_parser.add_argument('--since', help='Data inicial (YYYY-MM-DD ou N dias atrás, ex.: 7d)')
+    query_group = query_parser.add_mutually_exclusive_group(required=True)
+    query_group.add_argument('--test', help='Lista as execuções em que este teste falhou')
+    query_group.add_argument('--flaky', action='store_true', help='Lista os testes flaky')
+    
+    # Comando: plan
+    plan_parser = subparsers.add_parser('plan', help='Simula o poder de detecção para escolher o número de rodadas')
+    plan_parser.add_argument('--rates', default='0.01,0.05,0.1,0.2,0.5',
+                            help='Taxas de falha verdadeiras a simular (default: 0.01,0.05,0.1,0.2,0.5)')
+    plan_parser.add_argument('--rounds', default=None,
+                            help='Números de rodadas a avaliar (default: 10,20,30,50 e PYTHON_TEST_ROUNDS)')
+    plan_parser.add_argument('--target-power', type=float, default=0.9,
+                            help='Poder desejado para a recomendação de rodadas (default: 0.9)')
+    plan_parser.add_argument('--suite-size', type=int, default=1000,
+                            help='Testes estáveis por suíte, para falsos positivos (default: 1000)')
+    plan_parser.add_argument('--noise-rate', type=float, default=0.0,
+                            help='Probabilidade de falha por rodada de um teste estável (default: 0)')
+    plan_parser.add_argument('--simulations', type=int, default=100_000,
+                            help='Simulações por cenário (default: 100000)')
+    plan_parser.add_argument('--results-dir',
+                            help='Também estima o poder para as taxas observadas nos testes flaky de cada projeto')
     
     # Comando: dashboard
     dashboard_parser = subparsers.add_parser('dashboard', help='Executa dashboard web interativo')
@@ -85,6 +157,12 @@ Para mais informações sobre cada comando, use:
         elif args.command == 'html-report':
             generate_html_report(args)
         
+        elif args.command == 'plan':
+            plan_rounds(args)
+        
+        elif args.command == 'query':
+            query_database(args)
+        
         elif args.command == 'dashboard':
             run_dashboard(args)
             
@@ -116,18 +194,29 @@ def run_analysis(args):
     
     # Importa e executa o analisador
     sys.path.append('visualization')
-    from analyze_results import FlakyTestAnalyzer
+    from analyze_results import load_analyzer
     
     # Cria diretório de saída
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Executa análise
-    analyzer = FlakyTestAnalyzer(args.results_dir)
-    analyzer.scan_results()
+    # Executa análise (com --sample, só a prévia amostral, a menos que --full)
+    if args.sample is not None:
+        preview = load_analyzer(args, sample_rate=args.sample)
+        if preview.data:
+            print(preview.generate_sample_preview())
+        if not (preview.data and args.full):
+            if not preview.data:
+                print(f"❌ Nenhum resultado encontrado em '{args.from_dataset or args.from_db or args.results_dir}'")
+            return
+        print("⏳ Continuando com a análise completa...")
+        # Mesmas execuções da prévia, sem reprocessá-las
+        analyzer = preview.full_analysis()
+    else:
+        analyzer = load_analyzer(args)
     
     if not analyzer.data:
-        print(f"❌ Nenhum resultado encontrado em '{args.results_dir}'")
+        print(f"❌ Nenhum resultado encontrado em '{args.from_dataset or args.from_db or args.results_dir}'")
         return
     
     # Gera relatórios conforme o formato solicitado
@@ -143,12 +232,21 @@ def run_analysis(args):
         from html_report import HTMLReportGenerator
         generator = HTMLReportGenerator()
         html_path = output_dir / 'detailed_report.html'
-        generator.generate_full_report(args.results_dir, str(html_path))
+        generator.generate_full_report(args.results_dir, str(html_path),
+                                       dataset_dir=args.from_dataset, db_path=args.from_db)
     
     if args.format in ['all', 'csv']:
         print("💾 Exportando dados...")
         analyzer.export_data(output_dir)
     
+    if args.format == 'parquet':
+        print("📦 Exportando dataset Parquet...")
+        analyzer.export_dataset(output_dir / 'dataset')
+    
+    if args.format == 'sqlite':
+        print("🗄️  Gravando banco SQLite...")
+        analyzer.export_database(output_dir / 'flaky_tests.db')
+    
     # Gera visualizações
     print("📈 Gerando gráficos...")
     analyzer.generate_visualizations(output_dir)
@@ -163,7 +261,84 @@ def generate_html_report(args):
     from html_report import HTMLReportGenerator
     
     generator = HTMLReportGenerator()
-    generator.generate_full_report(args.results_dir, args.output)
+    generator.generate_full_report(args.results_dir, args.output, dataset_dir=args.from_dataset,
+                                   db_path=args.from_db)
+
+def plan_rounds(args):
+    """Simula o poder de detecção da regra is_flaky para escolher PYTHON_TEST_ROUNDS."""
+    sys.path.append('visualization')
+    from metrics import rounds_for_power, simulate_detection_power
+    
+    rates = [float(r) for r in args.rates.split(',')]
+    if args.rounds:
+        rounds = [int(r) for r in args.rounds.split(',')]
+    else:
+        rounds = [10, 20, 30, 50, int(os.environ.get('PYTHON_TEST_ROUNDS', 20))]
+    
+    print(f"🎲 Simulando {args.simulations} testes por cenário...")
+    df = simulate_detection_power(rates, rounds, suite_size=args.suite_size,
+                                  noise_rate=args.noise_rate, simulations=args.simulations)
+    
+    table = df.pivot(index='failure_rate', columns='rounds', values='power')
+    print("\n📈 Poder de detecção (taxa de falha × rodadas):")
+    print(table.apply(lambda column: column.map('{:.1%}'.format)).to_string())
+    
+    widths = df.pivot(index='failure_rate', columns='rounds', values='mean_ci_width')
+    print("\n📏 Largura média do IC 95% (Wilson):")
+    print(widths.apply(lambda column: column.map('{:.3f}'.format)).to_string())
+    
+    if args.noise_rate > 0:
+        fp = df.groupby('rounds')[['false_positive_rate', 'suite_false_alarm']].first()
+        print(f"\n⚠️  Falsos positivos (ruído {args.noise_rate:.2%} por rodada, {args.suite_size} testes estáveis):")
+        print(fp.to_string(formatters={'false_positive_rate': '{:.3%}'.format,
+                                       'suite_false_alarm': '{:.1%}'.format}))
+    
+    print(f"\n🎯 Rodadas para poder ≥ {args.target_power:.0%}:")
+    for rate in rates:
+        needed = rounds_for_power(rate, args.target_power, simulations=args.simulations)
+        print(f"  - taxa {rate:.0%}: {needed if needed is not None else '> 200'} rodadas")
+    
+    if args.results_dir:
+        from analyze_results import FlakyTestAnalyzer
+        
+        analyzer = FlakyTestAnalyzer(args.results_dir)
+        analyzer.scan_results()
+        
+        print("\n📦 Poder esperado para os testes flaky observados em cada projeto:")
+        for project, metrics in analyzer.test_metrics.items():
+            observed = metrics.loc[metrics['is_flaky'], 'failure_rate'].to_numpy()
+            if not len(observed):
+                continue
+            project_df = simulate_detection_power(observed, rounds, simulations=args.simulations)
+            expected = project_df.groupby('rounds')['power'].mean()
+            summary = ', '.join(f"{n} rodadas: {p:.1%}" for n, p in expected.items())
+            print(f"  - {project} ({len(observed)} testes flaky): {summary}")
+
+def query_database(args):
+    """Consulta o banco SQLite gerado por 'analyze --format sqlite'."""
+    sys.path.append('visualization')
+    from datetime import date, timedelta
+    from results_store import SQLiteResultsStore
+    
+    if not Path(args.db).exists():
+        print(f"❌ Banco não encontrado: {args.db} (gere com: python main.py analyze --format sqlite)")
+        return
+    
+    since = args.since
+    if since and since.endswith('d') and since[:-1].isdigit():
+        since = (date.today() - timedelta(days=int(since[:-1]))).isoformat()
+    
+    with SQLiteResultsStore(args.db) as store:
+        if args.test:
+            df = store.runs_with_failures(args.test, project=args.project)
+            title = f"Execuções em que {args.test} falhou"
+        else:
+            df = store.flaky_tests(project=args.project, tool=args.tool, since=since)
+            title = "Testes flaky" + (f" desde {since}" if since else "")
+    
+    print(f"🔎 {title}: {len(df)}")
+    if not df.empty:
+        print(df.to_string(index=False))
 
 def run_dashboard(args):
     """Executa o dashboard web interativo."""
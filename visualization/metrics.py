@@ -6,12 +6,19 @@ This module provides statistical and comparative metrics for evaluating
 the effectiveness of flaky test detection tools.
 """
 
+import hashlib
+from functools import lru_cache
+
 import numpy as np
 import pandas as pd
 from scipy import stats
-from typing import Dict, List, Tuple, Optional
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from typing import Dict, Iterable, List, Tuple, Optional
 from dataclasses import dataclass
 
+from outcome_matrix import OutcomeMatrix, TestIndex
+
 
 @dataclass
 class TestMetrics:
@@ -28,6 +35,66 @@ class TestMetrics:
     flakiness_severity: str  # 'low', 'medium', 'high', 'deterministic'
 
 
+@dataclass
+class TestMetricsBatch:
+    """Metrics for many tests at once, one array element per test."""
+    total_runs: np.ndarray
+    failures: np.ndarray
+    failure_rate: np.ndarray
+    is_flaky: np.ndarray
+    variance: np.ndarray
+    std_dev: np.ndarray
+    ci_lower: np.ndarray
+    ci_upper: np.ndarray
+    p_value: np.ndarray
+    flakiness_severity: np.ndarray  # object array of severity names
+    
+    def __len__(self) -> int:
+        return len(self.total_runs)
+    
+    def to_test_metrics(self, test_names: List[str]) -> Dict[str, TestMetrics]:
+        """Per-test ``TestMetrics`` objects, keyed by name (in array order)."""
+        return {
+            test_name: TestMetrics(
+                test_name=test_name,
+                total_runs=int(self.total_runs[i]),
+                failures=int(self.failures[i]),
+                failure_rate=float(self.failure_rate[i]),
+                is_flaky=bool(self.is_flaky[i]),
+                variance=float(self.variance[i]),
+                std_dev=float(self.std_dev[i]),
+                confidence_interval_95=(float(self.ci_lower[i]), float(self.ci_upper[i])),
+                p_value=float(self.p_value[i]),
+                flakiness_severity=self.flakiness_severity[i]
+            )
+            for i, test_name in enumerate(test_names)
+        }
+    
+    def to_frame(self, test_names: List[str], test_ids: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Struct-of-arrays table of the batch: one row per test, indexed by ``test_ids``.
+        
+        Columns follow test_metrics_detailed.csv: the 95% interval is split
+        into ``ci_lower``/``ci_upper`` and ``severity`` is categorical, so a
+        project's metrics take a few typed columns instead of one
+        ``TestMetrics`` object per test.
+        """
+        index = pd.Index(np.arange(len(self)) if test_ids is None else test_ids, name='test_id')
+        return pd.DataFrame({
+            'test_name': test_names,
+            'total_runs': self.total_runs.astype(np.int32),
+            'failures': self.failures.astype(np.int32),
+            'failure_rate': self.failure_rate,
+            'is_flaky': self.is_flaky,
+            'severity': pd.Categorical(self.flakiness_severity),
+            'variance': self.variance,
+            'std_dev': self.std_dev,
+            'ci_lower': self.ci_lower,
+            'ci_upper': self.ci_upper,
+            'p_value': self.p_value
+        }, index=index)
+
+
 @dataclass
 class ToolComparisonMetrics:
     """Comparative metrics between detection tools."""
@@ -42,6 +109,17 @@ class ToolComparisonMetrics:
     jaccard_similarity: float
 
 
+@dataclass
+class CoFailurePair:
+    """Two tests whose failures are correlated across the same runs."""
+    test_a: str
+    test_b: str
+    co_failures: int  # Runs in which both tests failed
+    phi_coefficient: float  # Signed phi (Pearson correlation of the failure indicators)
+    chi_square: float  # Yates-corrected, as in chi_square_independence_test
+    p_value: float
+
+
 class FlakinessMetrics:
     """
     Calculate comprehensive metrics for flaky test detection analysis.
@@ -120,6 +198,58 @@ class FlakinessMetrics:
             flakiness_severity=severity
         )
     
+    @staticmethod
+    def calculate_batch(failures: np.ndarray, totals: np.ndarray,
+                        significance_level: Optional[float] = None) -> TestMetricsBatch:
+        """
+        Vectorized ``calculate_test_metrics`` for many tests at once.
+        
+        Every test of a rerun campaign shares the same handful of (failures,
+        runs) pairs - at most ``rounds + 1`` of them for a fixed round count -
+        so the binomial tests run once per distinct pair and everything else
+        is computed with array operations.
+        
+        Args:
+            failures: Number of runs each test failed in
+            totals: Number of runs of each test
+            significance_level: Alpha for ``is_flaky`` (default SIGNIFICANCE_LEVEL)
+            
+        Returns:
+            TestMetricsBatch with one element per test, matching
+            ``calculate_test_metrics`` test by test
+        """
+        failures = np.asarray(failures, dtype=np.int64)
+        totals = np.asarray(totals, dtype=np.int64)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            failure_rate = np.where(totals > 0, failures / totals, 0.0)
+        variance = failure_rate * (1 - failure_rate)
+        ci_lower, ci_upper = FlakinessMetrics._wilson_confidence_interval_batch(failures, totals)
+        
+        # One significance test per distinct (failures, runs) pair
+        pairs, inverse = np.unique(np.stack([failures, totals]), axis=1, return_inverse=True)
+        unique_p_values = np.array([
+            FlakinessMetrics._test_flakiness_significance(int(k), int(n)) for k, n in pairs.T
+        ])
+        p_value = unique_p_values[inverse.reshape(-1)] if len(unique_p_values) else np.ones(len(failures))
+        
+        if significance_level is None:
+            significance_level = FlakinessMetrics.SIGNIFICANCE_LEVEL
+        is_flaky = (0 < failures) & (failures < totals) & (p_value < significance_level)
+        
+        return TestMetricsBatch(
+            total_runs=totals,
+            failures=failures,
+            failure_rate=failure_rate,
+            is_flaky=is_flaky,
+            variance=variance,
+            std_dev=np.sqrt(variance),
+            ci_lower=ci_lower,
+            ci_upper=ci_upper,
+            p_value=p_value,
+            flakiness_severity=FlakinessMetrics._categorize_severity_batch(failure_rate, is_flaky)
+        )
+    
     @staticmethod
     def _wilson_confidence_interval(successes: int, total: int, 
                                     confidence: float = 0.95) -> Tuple[float, float]:
@@ -141,6 +271,23 @@ class FlakinessMetrics:
         
         return (max(0, center - margin), min(1, center + margin))
     
+    @staticmethod
+    def _wilson_confidence_interval_batch(successes: np.ndarray, totals: np.ndarray,
+                                          confidence: float = 0.95) -> Tuple[np.ndarray, np.ndarray]:
+        """Wilson score intervals of many proportions; (0, 0) where ``totals`` is 0."""
+        z = stats.norm.ppf((1 + confidence) / 2)
+        n = np.where(totals > 0, totals, 1).astype(float)
+        p = successes / n
+        denominator = 1 + z**2 / n
+        
+        center = (p + z**2 / (2 * n)) / denominator
+        margin = z * np.sqrt((p * (1 - p) + z**2 / (4 * n)) / n) / denominator
+        
+        empty = totals == 0
+        lower = np.where(empty, 0.0, np.maximum(0, center - margin))
+        upper = np.where(empty, 0.0, np.minimum(1, center + margin))
+        return lower, upper
+    
     @staticmethod
     def _test_flakiness_significance(failures: int, total_runs: int) -> float:
         """
@@ -198,6 +345,38 @@ class FlakinessMetrics:
         
         return 'low'
     
+    @staticmethod
+    def _categorize_severity_batch(failure_rate: np.ndarray, is_flaky: np.ndarray) -> np.ndarray:
+        """
+        Vectorized ``_categorize_severity``.
+        
+        Flaky tests are binned with ``np.digitize`` over the edges of
+        SEVERITY_THRESHOLDS; rates falling between two thresholds get the
+        same middle-range fallback as the scalar version.
+        """
+        thresholds = list(FlakinessMetrics.SEVERITY_THRESHOLDS.items())
+        edges = sorted({bound for _, bounds in thresholds for bound in bounds})
+        # Bin i covers [edges[i-1], edges[i]); None marks a gap between thresholds
+        bin_labels = [None] + [
+            next((name for name, (lower, upper) in thresholds if lower <= lo and hi <= upper), None)
+            for lo, hi in zip(edges[:-1], edges[1:])
+        ] + [None]
+        
+        binned = np.array(bin_labels, dtype=object)[np.digitize(failure_rate, edges)]
+        fallback = np.select(
+            [(0.40 <= failure_rate) & (failure_rate <= 0.60),
+             (0.10 <= failure_rate) & (failure_rate <= 0.90)],
+            ['high', 'medium'], default='low'
+        ).astype(object)
+        flaky_severity = np.where(np.equal(binned, None), fallback, binned)
+        
+        stable_severity = np.select(
+            [failure_rate < 0.01, failure_rate > 0.99],
+            ['stable_pass', 'stable_fail'], default='unstable'
+        ).astype(object)
+        
+        return np.where(is_flaky, flaky_severity, stable_severity)
+    
     @staticmethod
     def compare_tools(tool_a_tests: set, tool_b_tests: set, 
                      tool_a_name: str = "Tool A", 
@@ -237,6 +416,29 @@ class FlakinessMetrics:
             jaccard_similarity=jaccard
         )
     
+    @staticmethod
+    def jaccard_matrix(detections: np.ndarray) -> np.ndarray:
+        """
+        Jaccard similarity between the detections of every pair of runs.
+        
+        Equivalent to ``compare_tools(tests_i, tests_j).jaccard_similarity``
+        over the detected test sets of every pair of runs, from one
+        ``X @ X.T`` product over their bitsets.
+        
+        Args:
+            detections: Boolean array of shape (runs, tests), True where the
+                run reported the test as flaky
+            
+        Returns:
+            Symmetric (runs, runs) array (0.0 where neither run detected anything)
+        """
+        x = np.asarray(detections, dtype=bool).astype(np.float64)
+        common = x @ x.T
+        sizes = np.diag(common)
+        union = sizes[:, None] + sizes[None, :] - common
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(union > 0, common / union, 0.0)
+    
     @staticmethod
     def chi_square_independence_test(test_a_results: List[bool], 
                                      test_b_results: List[bool]) -> Dict[str, float]:
@@ -280,6 +482,94 @@ class FlakinessMetrics:
             'independent': p_value > FlakinessMetrics.SIGNIFICANCE_LEVEL
         }
     
+    @staticmethod
+    def co_failure_analysis(failures: np.ndarray, test_names: List[str],
+                            top_k: int = 20, min_co_failures: int = 2,
+                            ran: Optional[np.ndarray] = None) -> Dict:
+        """
+        Correlate the failures of every pair of tests at once.
+        
+        The 2x2 contingency table of every pair follows from matrix
+        products over the runs × tests failure matrix X and the matrix R of
+        the runs each test ran in: ``R.T @ R`` counts the runs both tests
+        of a pair ran in, ``X.T @ X`` their co-failures and ``X.T @ R`` the
+        failures of one test among the runs the other one ran in. Only
+        tests that failed in some but not all of their runs take part (the
+        test is undefined for the others).
+        
+        Args:
+            failures: Boolean array of shape (runs, tests), True where the
+                test failed in that run
+            test_names: Name of each column of ``failures``
+            top_k: Number of pairs to return
+            min_co_failures: Ignore pairs that failed together fewer times
+            ran: Boolean array of the same shape, True where the test ran
+                (None = every test ran in every run)
+            
+        Returns:
+            Dictionary with ``pairs`` (the ``top_k`` most positively
+            correlated pairs as CoFailurePair, strongest first) and
+            ``clusters`` (groups of tests linked by significant positive
+            correlations, largest first)
+        """
+        failures = np.asarray(failures, dtype=bool)
+        ran = np.ones_like(failures) if ran is None else np.asarray(ran, dtype=bool)
+        counts = failures.sum(axis=0)
+        varying = np.flatnonzero((counts > 0) & (counts < ran.sum(axis=0)))
+        if len(varying) < 2:
+            return {'pairs': [], 'clusters': []}
+        
+        x = failures[:, varying].astype(np.float64)
+        r = ran[:, varying].astype(np.float64)
+        both = x.T @ x  # n11 of every pair
+        runs = r.T @ r  # runs in which both tests of the pair ran
+        failed_when_ran = x.T @ r  # [a, b]: failures of a among the runs b ran in
+        
+        rows, cols = np.triu_indices(len(varying), k=1)
+        n11 = both[rows, cols]
+        keep = n11 >= min_co_failures
+        rows, cols, n11 = rows[keep], cols[keep], n11[keep]
+        
+        n = runs[rows, cols]
+        fa, fb = failed_when_ran[rows, cols], failed_when_ran[cols, rows]
+        # ad - bc of the pair's contingency table, and the product of its margins
+        determinant = n11 * n - fa * fb
+        margins = fa * (n - fa) * fb * (n - fb)
+        # A test that failed in every run the other one ran in carries no information on the pair
+        keep = margins > 0
+        rows, cols, n11, n, fa, fb = rows[keep], cols[keep], n11[keep], n[keep], fa[keep], fb[keep]
+        determinant, margins = determinant[keep], margins[keep]
+        phi = determinant / np.sqrt(margins)
+        chi_square = n * np.maximum(np.abs(determinant) - n / 2, 0) ** 2 / margins
+        p_value = stats.chi2.sf(chi_square, df=1)
+        
+        positive = phi > 0
+        order = np.lexsort((p_value, -phi))
+        order = order[positive[order]][:top_k]
+        pairs = [
+            CoFailurePair(
+                test_a=test_names[varying[rows[i]]],
+                test_b=test_names[varying[cols[i]]],
+                co_failures=int(n11[i]),
+                phi_coefficient=float(phi[i]),
+                chi_square=float(chi_square[i]),
+                p_value=float(p_value[i])
+            )
+            for i in order
+        ]
+        
+        # Clusters: connected components of the significant positive pairs
+        linked = positive & (p_value < FlakinessMetrics.SIGNIFICANCE_LEVEL)
+        graph = coo_matrix((np.ones(linked.sum()), (rows[linked], cols[linked])),
+                           shape=(len(varying), len(varying)))
+        _, labels = connected_components(graph, directed=False)
+        members = {}
+        for position, label in enumerate(labels):
+            members.setdefault(label, []).append(test_names[varying[position]])
+        clusters = sorted((group for group in members.values() if len(group) > 1), key=len, reverse=True)
+        
+        return {'pairs': pairs, 'clusters': clusters}
+    
     @staticmethod
     def calculate_project_metrics(test_metrics_list: List[TestMetrics]) -> Dict:
         """
@@ -322,9 +612,328 @@ class FlakinessMetrics:
             'min_p_value': min(tm.p_value for tm in flaky_tests) if flaky_tests else 1.0,
             'max_failure_rate': max(tm.failure_rate for tm in flaky_tests) if flaky_tests else 0.0
         }
+    
+    @staticmethod
+    def calculate_project_metrics_frame(test_metrics: pd.DataFrame) -> Dict:
+        """
+        ``calculate_project_metrics`` over a table built by ``TestMetricsBatch.to_frame``.
+        
+        Args:
+            test_metrics: One row per test of the project
+            
+        Returns:
+            Dictionary with project-level statistics (same keys and values)
+        """
+        if test_metrics.empty:
+            return FlakinessMetrics.calculate_project_metrics([])
+        
+        flaky = test_metrics[test_metrics['is_flaky']]
+        flaky_failure_rates = flaky['failure_rate'].to_numpy()
+        severity_counts = test_metrics['severity'].value_counts(sort=False)
+        
+        return {
+            'total_tests': len(test_metrics),
+            'flaky_tests': len(flaky),
+            'flaky_percentage': 100 * len(flaky) / len(test_metrics),
+            'severity_distribution': {str(name): int(count) for name, count in severity_counts.items() if count},
+            'avg_failure_rate': np.mean(flaky_failure_rates) if len(flaky) else 0.0,
+            'median_failure_rate': np.median(flaky_failure_rates) if len(flaky) else 0.0,
+            'min_p_value': float(flaky['p_value'].min()) if len(flaky) else 1.0,
+            'max_failure_rate': float(flaky_failure_rates.max()) if len(flaky) else 0.0
+        }
 
 
-def parse_pytest_runs_csv(csv_path: str) -> Dict[str, List[bool]]:
+def hash_sample(test_names: Iterable[str], sample_rate: float) -> np.ndarray:
+    """
+    Deterministic sample of test ids: True for the tests kept at ``sample_rate``.
+    
+    A test is kept when the first 8 bytes of the BLAKE2b hash of its name,
+    read as a fraction of 2**64, fall below ``sample_rate``. The decision
+    depends on the name alone, so every run, process and project keeps the
+    same tests, and a sample at a higher rate contains the one at a lower rate.
+    """
+    threshold = int(sample_rate * 2 ** 64)
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest(), 'big') < threshold
+         for name in test_names),
+        dtype=bool
+    )
+
+
+def estimate_project_metrics(sample: pd.DataFrame, sample_rate: float) -> Dict:
+    """
+    Project metrics extrapolated from the per-test metrics of a ``hash_sample``.
+    
+    Each test is in the sample independently with probability ``sample_rate``
+    (Poisson sampling), so counts are scaled by 1 / sample_rate and rates are
+    the sample ratios; all standard errors carry the finite population
+    correction (1 - sample_rate) and vanish for a full sample.
+    
+    Args:
+        sample: ``TestMetricsBatch.to_frame`` table of the sampled tests
+        sample_rate: Fraction of test ids sampled
+        
+    Returns:
+        ``calculate_project_metrics`` dictionary with estimated values, plus
+        ``sample_rate`` and ``standard_errors`` (total_tests, flaky_tests,
+        flaky_percentage, avg_failure_rate)
+    """
+    metrics = FlakinessMetrics.calculate_project_metrics_frame(sample)
+    n_sampled, n_flaky = metrics['total_tests'], metrics['flaky_tests']
+    fpc = 1 - sample_rate
+    
+    flaky_rates = sample.loc[sample['is_flaky'], 'failure_rate'].to_numpy() if n_sampled else np.array([])
+    share = n_flaky / n_sampled if n_sampled else 0.0
+    
+    metrics.update({
+        'total_tests': int(round(n_sampled / sample_rate)),
+        'flaky_tests': int(round(n_flaky / sample_rate)),
+        'severity_distribution': {
+            severity: int(round(count / sample_rate))
+            for severity, count in metrics['severity_distribution'].items()
+        },
+        'sample_rate': sample_rate,
+        'standard_errors': {
+            'total_tests': float(np.sqrt(n_sampled * fpc) / sample_rate),
+            'flaky_tests': float(np.sqrt(n_flaky * fpc) / sample_rate),
+            'flaky_percentage': float(100 * np.sqrt(share * (1 - share) / n_sampled * fpc)) if n_sampled else 0.0,
+            'avg_failure_rate': (float(np.std(flaky_rates, ddof=1) / np.sqrt(n_flaky) * np.sqrt(fpc))
+                                 if n_flaky > 1 else 0.0)
+        }
+    })
+    return metrics
+
+
+def _flaky_lookup(rounds: int, significance_level: Optional[float] = None) -> np.ndarray:
+    """
+    ``is_flaky`` for k = 0..rounds failures out of ``rounds`` runs.
+    
+    Under the degenerate nulls p=0 and p=1 of ``_test_flakiness_significance``
+    the two-sided binomial p-value of k is just the null's pmf at k, so the
+    whole table comes from two vectorized ``binom.pmf`` calls instead of one
+    ``binomtest`` per k. Read-only: the arrays are shared through the cache.
+    """
+    # Resolved before the cached call, so the table follows changes to SIGNIFICANCE_LEVEL
+    if significance_level is None:
+        significance_level = FlakinessMetrics.SIGNIFICANCE_LEVEL
+    return _flaky_lookup_table(rounds, significance_level)
+
+
+@lru_cache(maxsize=None)
+def _flaky_lookup_table(rounds: int, significance_level: float) -> np.ndarray:
+    k = np.arange(rounds + 1)
+    p_value = np.maximum(stats.binom.pmf(k, rounds, 0.0), stats.binom.pmf(k, rounds, 1.0))
+    lookup = (0 < k) & (k < rounds) & (p_value < significance_level)
+    lookup.flags.writeable = False
+    return lookup
+
+
+def simulate_detection_power(failure_rates: Iterable[float], rounds: Iterable[int],
+                             suite_size: int = 1000, noise_rate: float = 0.0,
+                             simulations: int = 100_000, seed: Optional[int] = 0,
+                             significance_level: Optional[float] = None) -> pd.DataFrame:
+    """
+    Monte Carlo estimate of how well the ``is_flaky`` rule detects flaky tests.
+    
+    For every round count, the number of failures of each simulated test is
+    drawn at once from Binomial(rounds, rate) - the sum of its Bernoulli
+    rounds - and classified through a lookup table of ``is_flaky`` over
+    the ``rounds + 1`` possible counts.
+    
+    Args:
+        failure_rates: True per-round failure probabilities of flaky tests
+        rounds: Round counts to evaluate (e.g. candidate PYTHON_TEST_ROUNDS)
+        suite_size: Stable tests per simulated suite, for the false-positive estimates
+        noise_rate: Per-round failure probability of a stable test (e.g.
+            infrastructure errors); 0 means stable tests never fail
+        simulations: Simulated flaky tests per (rate, rounds) and simulated
+            suites per round count
+        seed: Random seed (None for a fresh one)
+        significance_level: Alpha of the ``is_flaky`` rule (default SIGNIFICANCE_LEVEL)
+        
+    Returns:
+        DataFrame with one row per (failure_rate, rounds): ``power``
+        (probability of detecting the flaky test) and its Monte Carlo
+        standard error, ``mean_ci_width`` (Wilson 95% interval), and the
+        per-round-count ``false_positive_rate`` (stable tests flagged) and
+        ``suite_false_alarm`` (suites with at least one stable test flagged)
+    """
+    rng = np.random.default_rng(seed)
+    failure_rates = [float(rate) for rate in failure_rates]
+    rows = []
+    
+    for n in sorted(set(int(r) for r in rounds)):
+        flaky_lookup = _flaky_lookup(n, significance_level)
+        
+        # False positives among stable tests, in chunks of whole suites
+        flagged_tests = 0
+        alarmed_suites = 0
+        if noise_rate > 0:
+            chunk = max(1, 10_000_000 // max(suite_size, 1))
+            for start in range(0, simulations, chunk):
+                suites = min(chunk, simulations - start)
+                flagged = flaky_lookup[rng.binomial(n, noise_rate, size=(suites, suite_size))]
+                flagged_tests += int(flagged.sum())
+                alarmed_suites += int(flagged.any(axis=1).sum())
+        false_positive_rate = flagged_tests / (simulations * suite_size)
+        suite_false_alarm = alarmed_suites / simulations
+        
+        totals = np.full(simulations, n)
+        for rate in failure_rates:
+            failures = rng.binomial(n, rate, size=simulations)
+            power = flaky_lookup[failures].mean()
+            lower, upper = FlakinessMetrics._wilson_confidence_interval_batch(failures, totals)
+            rows.append({
+                'failure_rate': rate,
+                'rounds': n,
+                'power': power,
+                'power_std_error': np.sqrt(power * (1 - power) / simulations),
+                'mean_ci_width': float((upper - lower).mean()),
+                'false_positive_rate': false_positive_rate,
+                'suite_false_alarm': suite_false_alarm
+            })
+    
+    return pd.DataFrame(rows)
+
+
+def rounds_for_power(failure_rate: float, target_power: float = 0.9, max_rounds: int = 200,
+                     simulations: int = 100_000, seed: Optional[int] = 0,
+                     significance_level: Optional[float] = None) -> Optional[int]:
+    """
+    Smallest round count whose simulated power reaches ``target_power``.
+    
+    Returns:
+        Number of rounds, or None if ``max_rounds`` is not enough
+    """
+    rng = np.random.default_rng(seed)
+    for n in range(1, max_rounds + 1):
+        failures = rng.binomial(n, failure_rate, size=simulations)
+        if _flaky_lookup(n, significance_level)[failures].mean() >= target_power:
+            return n
+    return None
+
+
+class FlakinessAggregator:
+    """
+    Per-test flakiness counts.
+    
+    Only the sufficient statistics - failures and runs - of each test are
+    kept. ``is_flaky`` and the severity are recomputed from the stored
+    counts on demand, so a different SIGNIFICANCE_LEVEL or
+    SEVERITY_THRESHOLDS applies without re-reading any runs.csv.
+    
+    Aggregators of different runs (or projects) are combined with ``merge``,
+    which adds their counts.
+    """
+    
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._failures: List[int] = []
+        self._runs: List[int] = []
+    
+    @classmethod
+    def from_matrix(cls, outcomes: OutcomeMatrix) -> 'FlakinessAggregator':
+        """Aggregator holding the counts of every test of an outcome matrix (cells not run don't count).
+        
+        Tests that never ran (skipped in every round) have no counts and are left out.
+        """
+        runs = outcomes.runs_per_test()
+        kept = np.flatnonzero(runs > 0)
+        aggregator = cls()
+        aggregator._names = [outcomes.tests.name_of(i) for i in kept]
+        aggregator._index = {test_name: i for i, test_name in enumerate(aggregator._names)}
+        aggregator._failures = outcomes.failures_per_test()[kept].tolist()
+        aggregator._runs = runs[kept].tolist()
+        return aggregator
+    
+    def _position(self, test_name: str) -> int:
+        position = self._index.get(test_name)
+        if position is None:
+            position = self._index[test_name] = len(self._names)
+            self._names.append(test_name)
+            self._failures.append(0)
+            self._runs.append(0)
+        return position
+    
+    def add_counts(self, test_name: str, failures: int, runs: int) -> None:
+        """Add ``failures`` out of ``runs`` to a test's counts."""
+        position = self._position(test_name)
+        self._failures[position] += int(failures)
+        self._runs[position] += int(runs)
+    
+    def merge(self, other: 'FlakinessAggregator') -> 'FlakinessAggregator':
+        """Add the counts of another aggregator to this one (returns self)."""
+        for test_name, failures, runs in zip(other._names, other._failures, other._runs):
+            self.add_counts(test_name, failures, runs)
+        return self
+    
+    @property
+    def test_names(self) -> List[str]:
+        return self._names
+    
+    def __len__(self) -> int:
+        return len(self._names)
+    
+    def __contains__(self, test_name: str) -> bool:
+        return test_name in self._index
+    
+    def counts(self, test_name: str) -> Tuple[int, int]:
+        """(failures, runs) of a test."""
+        position = self._index[test_name]
+        return self._failures[position], self._runs[position]
+    
+    def calculate_batch(self, significance_level: Optional[float] = None) -> TestMetricsBatch:
+        """Metrics of every test (in ``test_names`` order) from the stored counts."""
+        return FlakinessMetrics.calculate_batch(
+            np.array(self._failures, dtype=np.int64), np.array(self._runs, dtype=np.int64),
+            significance_level=significance_level
+        )
+
+
+# Rows of runs.csv read at a time; bounds memory on very long rerun campaigns
+RUNS_CSV_CHUNK_SIZE = 10_000
+
+
+def parse_pytest_runs_matrix(csv_path: str, chunksize: int = RUNS_CSV_CHUNK_SIZE) -> Tuple[List[str], np.ndarray]:
+    """
+    Parse pytest runs.csv into a boolean runs × tests failure matrix.
+    
+    ``failed_tests_list`` is split on ``;`` once per chunk and exploded into
+    (run, test) pairs, which are then pivoted into the matrix in a single
+    vectorized assignment.
+    
+    Args:
+        csv_path: Path to runs.csv file
+        chunksize: Rows read per chunk
+        
+    Returns:
+        Tuple of (test names in order of first failure, bool array of shape
+        (runs, tests) with True where the test failed in that run)
+    """
+    n_runs = 0
+    run_positions = []
+    failed_names = []
+    
+    for chunk in pd.read_csv(csv_path, usecols=['failed_tests_list'], dtype=str,
+                             chunksize=chunksize, keep_default_na=False):
+        # After explode the index still holds each test's row within the chunk
+        tests = chunk['failed_tests_list'].reset_index(drop=True).str.split(';').explode().str.strip()
+        tests = tests[tests != '']
+        run_positions.append(tests.index.to_numpy() + n_runs)
+        failed_names.append(tests.to_numpy())
+        n_runs += len(chunk)
+    
+    if not failed_names:
+        return [], np.zeros((n_runs, 0), dtype=bool)
+    
+    codes, names = pd.factorize(np.concatenate(failed_names))
+    matrix = np.zeros((n_runs, len(names)), dtype=bool)
+    matrix[np.concatenate(run_positions), codes] = True
+    return list(names), matrix
+
+
+def parse_pytest_runs_csv(csv_path: str) -> OutcomeMatrix:
     """
     Parse pytest runs.csv file to extract per-test failure information.
     
@@ -332,32 +941,94 @@ def parse_pytest_runs_csv(csv_path: str) -> Dict[str, List[bool]]:
         csv_path: Path to runs.csv file
         
     Returns:
-        Dictionary mapping test names to list of failure booleans (True = failed, False = passed)
+        OutcomeMatrix with one row per run and one column per test that
+        failed at least once (every listed test ran in every run)
+    """
+    names, matrix = parse_pytest_runs_matrix(csv_path)
+    return OutcomeMatrix.from_dense(matrix, TestIndex(names))
+
+
+def parse_pytest_outcomes(outcome_files: List[str]) -> OutcomeMatrix:
+    """
+    Parse the per-round JSONL files written by the ``pytest_outcomes`` plugin.
+
+    Unlike runs.csv, which only lists failures, these files report every
+    test that ran. Row i of the matrix is the i-th file; a test that did
+    not run (or was skipped) in a round has its ``ran`` bit clear there, so
+    a test that passed every round has an empty failure column and rounds
+    it missed are not counted as runs. Every reported test gets a column,
+    so one skipped in every round has no ``ran`` bits at all.
+
+    Args:
+        outcome_files: One file per round, in round order (``run_N.jsonl``,
+            then ``confirm_N.jsonl`` for two-phase runs)
+
+    Returns:
+        OutcomeMatrix with one row per file and one column per reported test
     """
-    df = pd.read_csv(csv_path)
-    
-    # First pass: collect all unique tests that failed at least once
-    all_tests = set()
-    for _, row in df.iterrows():
-        if pd.notna(row['failed_tests_list']) and row['failed_tests_list']:
-            failed_tests = [t.strip() for t in str(row['failed_tests_list']).split(';') if t.strip()]
-            all_tests.update(failed_tests)
-    
-    # Initialize test_failures dict with all tests
-    test_failures = {test: [] for test in all_tests}
-    
-    # Second pass: mark pass/fail for each test in each run
-    for _, row in df.iterrows():
-        failed_in_run = set()
-        if pd.notna(row['failed_tests_list']) and row['failed_tests_list']:
-            failed_tests = [t.strip() for t in str(row['failed_tests_list']).split(';') if t.strip()]
-            failed_in_run = set(failed_tests)
-        
-        # Mark each test as passed or failed for this run
-        for test in all_tests:
-            test_failures[test].append(test in failed_in_run)
-    
-    return test_failures
+    frames = []
+    reported = []
+    for round_number, path in enumerate(outcome_files):
+        reports = pd.read_json(path, lines=True, dtype={'nodeid': str, 'when': str, 'outcome': str})
+        if reports.empty:
+            continue
+        reported.append(reports['nodeid'])
+        # Only the call phase says whether the test passed or failed; skips don't count as runs
+        calls = reports.loc[(reports['when'] == 'call') & reports['outcome'].isin(['passed', 'failed']),
+                            ['nodeid', 'outcome']]
+        frames.append(calls.assign(round=round_number, failed=calls['outcome'] == 'failed'))
+
+    if not frames:
+        return OutcomeMatrix.from_dense(np.zeros((len(outcome_files), 0), dtype=bool), TestIndex())
+
+    calls = pd.concat(frames, ignore_index=True)
+    # A test reported more than once in a round (e.g. reruns) failed that round if any report failed
+    per_round = calls.groupby(['nodeid', 'round'], sort=False)['failed'].any()
+    names = pd.Index(pd.unique(pd.concat(reported, ignore_index=True)))
+    codes = names.get_indexer(per_round.index.get_level_values('nodeid'))
+    rounds = per_round.index.get_level_values('round').to_numpy()
+    failed = np.zeros((len(outcome_files), len(names)), dtype=bool)
+    ran = np.zeros_like(failed)
+    failed[rounds, codes] = per_round.to_numpy()
+    ran[rounds, codes] = True
+    return OutcomeMatrix.from_dense(failed, TestIndex(names), ran)
+
+
+def parse_pytest_phases(runs_csv: str, confirm_csv: str, focus: Optional[List[str]] = None) -> OutcomeMatrix:
+    """
+    Parse a two-phase pytest run: full-suite discovery rounds (runs.csv) and
+    confirmation rounds of the tests that failed during discovery (confirm_runs.csv).
+
+    The matrix has the discovery rounds followed by the confirmation rounds
+    as rows. Tests outside the confirmation set have their ``ran`` bits
+    clear in the confirmation rows, so their failure rate is not diluted by
+    rounds they never ran.
+
+    Args:
+        runs_csv: Path to the discovery runs.csv
+        confirm_csv: Path to confirm_runs.csv (same schema)
+        focus: Tests rerun in the confirmation phase (default: every test
+            that failed during discovery)
+
+    Returns:
+        OutcomeMatrix with one row per round and one column per test that
+        failed during discovery or was confirmed
+    """
+    names, discovery = parse_pytest_runs_matrix(runs_csv)
+    confirm_names, confirmation = parse_pytest_runs_matrix(confirm_csv)
+
+    focus = set(names if focus is None else focus) | set(confirm_names)
+    tests = TestIndex(names)
+    focus_ids = tests.intern_all(sorted(focus))
+    n_discovery = len(discovery)
+
+    failed = np.zeros((n_discovery + len(confirmation), len(tests)), dtype=bool)
+    ran = np.zeros_like(failed)
+    failed[:n_discovery, :len(names)] = discovery
+    ran[:n_discovery] = True
+    failed[n_discovery:, tests.intern_all(confirm_names)] = confirmation
+    ran[n_discovery:, focus_ids] = True
+    return OutcomeMatrix.from_dense(failed, tests, ran)
 
 
 if __name__ == "__main__":
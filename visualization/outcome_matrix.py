@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Interned test ids and bit-packed outcome matrices.
+
+Test node ids (``tests/test_helpers.py::TestStreaming::test_async_view``,
+``org.apache.commons.lang3.StringUtilsTest#testIsBlank``) are interned once
+per project by ``TestIndex``, which maps every name to a dense integer id.
+Outcomes are then kept as an ``OutcomeMatrix``: one row per run (or round),
+one bit per test, packed eight tests to a byte with ``np.packbits``. A
+57k-test suite over 50 rounds takes ~360 KB instead of gigabytes of
+per-round string lists. It is the only form in which the analyzer keeps
+per-round outcomes - in memory, in the results manifest and in the stores -
+and the packed array can be saved as a ``.npy`` file and memory-mapped back
+with ``np.load(..., mmap_mode='r')``.
+"""
+
+import base64
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+
+class TestIndex:
+    """Bidirectional mapping between test names and dense integer ids."""
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name: str) -> int:
+        """Id of ``name``, assigning the next free one on first sight."""
+        test_id = self._ids.get(name)
+        if test_id is None:
+            test_id = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return test_id
+
+    def intern_all(self, names: Iterable[str]) -> np.ndarray:
+        """Ids of several names (interning new ones) as an int32 array."""
+        return np.fromiter((self.intern(name) for name in names), dtype=np.int32)
+
+    def id_of(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    def name_of(self, test_id: int) -> str:
+        return self._names[test_id]
+
+    @property
+    def names(self) -> List[str]:
+        """Test names ordered by id."""
+        return self._names
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+
+class OutcomeMatrix:
+    """
+    Runs × tests boolean matrix stored one bit per cell.
+
+    Rows are runs (or rounds of a run), columns are the ids of ``tests``;
+    a set bit means the test failed, or was reported flaky, in that row.
+
+    ``ran`` is a second packed plane marking the cells where the test
+    actually ran, for runs in which not every test runs every round (the
+    confirmation rounds of a two-phase run, tests skipped or deselected in
+    some rounds of a JSONL run). None means every test ran in every row,
+    which is what runs.csv and per-run detection lists give. A failure bit
+    is only ever set where the test ran.
+    """
+
+    def __init__(self, packed: np.ndarray, tests: TestIndex, ran: Optional[np.ndarray] = None):
+        self.packed = packed
+        self.tests = tests
+        self.ran = ran
+
+    @classmethod
+    def from_dense(cls, dense: np.ndarray, tests: TestIndex,
+                   ran: Optional[np.ndarray] = None) -> 'OutcomeMatrix':
+        """Pack a boolean (runs, len(tests)) array, and the cells that ran (None or all-True = every cell)."""
+        dense = np.asarray(dense, dtype=bool)
+        if ran is not None:
+            ran = np.asarray(ran, dtype=bool)
+            if ran.shape != dense.shape:
+                raise ValueError(f"ran mask of shape {ran.shape} does not match outcomes of shape {dense.shape}")
+            if (dense & ~ran).any():
+                raise ValueError("a test cannot fail in a round it did not run")
+            ran = None if ran.all() else np.packbits(ran, axis=1)
+        return cls(np.packbits(dense, axis=1), tests, ran)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Iterable[str]],
+                  tests: Optional[TestIndex] = None) -> 'OutcomeMatrix':
+        """
+        Build the matrix of one set of test names per row.
+
+        Used for tools that report a list of flaky tests per run (NonDex):
+        row i has a bit set for every test reported in run i.
+        """
+        tests = tests if tests is not None else TestIndex()
+        row_ids = [tests.intern_all(row) for row in rows]
+
+        dense = np.zeros((len(row_ids), len(tests)), dtype=bool)
+        for i, ids in enumerate(row_ids):
+            dense[i, ids] = True
+        return cls.from_dense(dense, tests)
+
+    @property
+    def n_runs(self) -> int:
+        return self.packed.shape[0]
+
+    @property
+    def n_tests(self) -> int:
+        return len(self.tests)
+
+    @property
+    def shape(self):
+        return self.n_runs, self.n_tests
+
+    @property
+    def nbytes(self) -> int:
+        return self.packed.nbytes + (self.ran.nbytes if self.ran is not None else 0)
+
+    def __len__(self) -> int:
+        """Number of test columns (a matrix without tests is falsy)."""
+        return self.n_tests
+
+    def to_dense(self) -> np.ndarray:
+        """Unpacked boolean (runs, tests) array."""
+        return np.unpackbits(self.packed, axis=1, count=self.n_tests).astype(bool)
+
+    def ran_mask(self) -> np.ndarray:
+        """Unpacked boolean (runs, tests) array of the cells where the test ran."""
+        if self.ran is None:
+            return np.ones(self.shape, dtype=bool)
+        return np.unpackbits(self.ran, axis=1, count=self.n_tests).astype(bool)
+
+    def failures_per_test(self) -> np.ndarray:
+        """Number of rows each test failed in, indexed by test id."""
+        return self.to_dense().sum(axis=0)
+
+    def runs_per_test(self) -> np.ndarray:
+        """Number of rows each test ran in, indexed by test id."""
+        if self.ran is None:
+            return np.full(self.n_tests, self.n_runs)
+        return self.ran_mask().sum(axis=0)
+
+    def take(self, test_ids: np.ndarray) -> 'OutcomeMatrix':
+        """Matrix of the given columns only, with a new index of their names."""
+        test_ids = np.asarray(test_ids, dtype=np.int64)
+        tests = TestIndex(self.tests.names[i] for i in test_ids)
+        ran = self.ran_mask()[:, test_ids] if self.ran is not None else None
+        return OutcomeMatrix.from_dense(self.to_dense()[:, test_ids], tests, ran)
+
+    def reindex(self, tests: TestIndex) -> 'OutcomeMatrix':
+        """
+        The same outcomes with columns at the ids of ``tests`` (interning new names).
+
+        Tests of ``tests`` that are not columns here get empty columns; they
+        count as not run when the matrix has a ``ran`` plane.
+        """
+        ids = tests.intern_all(self.tests.names)
+        dense = np.zeros((self.n_runs, len(tests)), dtype=bool)
+        dense[:, ids] = self.to_dense()
+        ran = None
+        if self.ran is not None:
+            ran = np.zeros_like(dense)
+            ran[:, ids] = self.ran_mask()
+        return OutcomeMatrix.from_dense(dense, tests, ran)
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable form (packed bits as base64), for the results manifest."""
+        return {
+            'tests': self.tests.names,
+            'runs': self.n_runs,
+            'failed': base64.b64encode(self.packed.tobytes()).decode('ascii'),
+            'ran': base64.b64encode(self.ran.tobytes()).decode('ascii') if self.ran is not None else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'OutcomeMatrix':
+        tests = TestIndex(data['tests'])
+        shape = (data['runs'], (len(tests) + 7) // 8)
+
+        def unpack(encoded: str) -> np.ndarray:
+            return np.frombuffer(base64.b64decode(encoded), dtype=np.uint8).reshape(shape).copy()
+
+        return cls(unpack(data['failed']), tests, unpack(data['ran']) if data['ran'] is not None else None)
+
+    def save(self, path: Path) -> None:
+        """
+        Save the packed matrix to ``path`` (.npy) and the test names next to it.
+
+        Names go to ``<stem>.tests.txt``, one per line, in id order; the
+        ``ran`` plane, if any, to ``<stem>.ran.npy``.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.save(path, self.packed)
+        if self.ran is not None:
+            np.save(path.with_name(path.stem + '.ran.npy'), self.ran)
+        path.with_name(path.stem + '.tests.txt').write_text(
+            ''.join(f"{name}\n" for name in self.tests), encoding='utf-8'
+        )
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Persistent manifest cache for parsed experiment results.
+
+The manifest remembers, for every ``results/<project>/<tool>/<timestamp>``
+directory, the fingerprint (mtime, size and content hash) of each file it
+contains together with the run record produced by
+``FlakyTestAnalyzer._parse_run_results`` and the per-test outcomes
+extracted from ``runs.csv`` (an ``OutcomeMatrix``, stored bit-packed). On
+the next scan only directories that are new or whose files changed need to
+be parsed again.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from outcome_matrix import OutcomeMatrix
+
+
+MANIFEST_FILENAME = '.flaky_manifest.json'
+
+
+class ResultsManifest:
+    """
+    On-disk cache of parsed run directories, keyed by ``project/tool/timestamp``.
+
+    An entry is reused when the directory still holds the same set of files
+    and each file either has the same mtime and size, or - if those changed -
+    the same content hash (e.g. a log that was only touched or copied).
+    """
+
+    # Bump whenever the parsers change what they store in a run record, so
+    # that entries written by an older analyzer are re-parsed.
+    VERSION = 8
+
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.runs: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self._seen = set()
+        self._dirty = False
+        self.load()
+
+    def load(self) -> None:
+        """Load the manifest from disk, starting empty if it is missing or stale."""
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Cache de resultados ignorado ({self.path}): {e}")
+            return
+
+        if manifest.get('version') != self.VERSION:
+            self._dirty = True
+            return
+
+        self.runs = manifest.get('runs', {})
+
+    def get(self, key: str, run_dir: Path) -> Optional[Dict]:
+        """
+        Return the cached entry for a run directory if it is still fresh.
+
+        Args:
+            key: Manifest key (``project/tool/timestamp``)
+            run_dir: Run directory on disk
+
+        Returns:
+            Dict with ``record`` and ``outcomes`` (OutcomeMatrix or None), or
+            None on a cache miss
+        """
+        self._seen.add(key)
+        entry = self.runs.get(key)
+        if entry is None or not self._is_fresh(entry, run_dir):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        outcomes = entry['outcomes']
+        return {
+            'record': entry['record'],
+            'outcomes': OutcomeMatrix.from_dict(outcomes) if outcomes is not None else None
+        }
+
+    def put(self, key: str, run_dir: Path, record: Dict,
+            outcomes: Optional[OutcomeMatrix]) -> None:
+        """Store the parsed results of a run directory with a fresh fingerprint."""
+        previous = self.runs.get(key, {}).get('files', {})
+        self._seen.add(key)
+        self.runs[key] = {
+            'files': self._fingerprint(run_dir, previous),
+            'record': record,
+            'outcomes': outcomes.to_dict() if outcomes is not None else None
+        }
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write the manifest atomically, dropping directories that no longer exist."""
+        stale = set(self.runs) - self._seen
+        for key in stale:
+            del self.runs[key]
+
+        if not (self._dirty or stale):
+            return
+
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.VERSION, 'runs': self.runs}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            print(f"⚠️  Não foi possível salvar o cache de resultados ({self.path}): {e}")
+
+    def _is_fresh(self, entry: Dict, run_dir: Path) -> bool:
+        """Check a cached entry against the files currently in ``run_dir``."""
+        cached_files = entry.get('files', {})
+        current = self._list_files(run_dir)
+        if set(current) != set(cached_files):
+            return False
+
+        for name, stat in current.items():
+            cached = cached_files[name]
+            if stat.st_size != cached['size']:
+                return False
+            if stat.st_mtime_ns == cached['mtime_ns']:
+                continue
+            # Same size but newer mtime: only the content hash can tell
+            if self._hash_file(run_dir / name) != cached['sha256']:
+                return False
+            cached['mtime_ns'] = stat.st_mtime_ns
+            self._dirty = True
+
+        return True
+
+    def _fingerprint(self, run_dir: Path, previous: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Fingerprint every file in ``run_dir``, reusing hashes of unchanged files."""
+        files = {}
+        for name, stat in self._list_files(run_dir).items():
+            old = previous.get(name)
+            if old and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+                digest = old['sha256']
+            else:
+                digest = self._hash_file(run_dir / name)
+            files[name] = {
+                'mtime_ns': stat.st_mtime_ns,
+                'size': stat.st_size,
+                'sha256': digest
+            }
+        return files
+
+    @staticmethod
+    def _list_files(run_dir: Path) -> Dict[str, os.stat_result]:
+        """Stat the regular files directly inside ``run_dir``."""
+        return {
+            entry.name: entry.stat()
+            for entry in os.scandir(run_dir)
+            if entry.is_file()
+        }
+
+    @classmethod
+    def _hash_file(cls, path: Path) -> str:
+        """SHA-256 of a file's content, read in fixed-size chunks."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(cls.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+"""
+Storage backends for the data collected by ``FlakyTestAnalyzer``.
+
+Parquet dataset
+---------------
+The Parquet dataset holds two tables, both partitioned by project, tool and
+run date (hive layout, e.g. ``runs/project=httpie/tool=pytest-rerun/run_date=2025-12-10/``):
+
+- ``runs``: one typed row per run directory (the run record without its lists),
+  plus ``n_runs``, the number of rounds of its outcome matrix (a run in which
+  no test failed has rounds but no outcome rows)
+- ``outcomes``: one row per (test, round) of each run. Round 0 holds the tests
+  a tool reported for the whole run (e.g. NonDex ``[WARNING]`` lines); rounds
+  1..N hold the pass/fail outcome of every test in ``runs.csv``, under the
+  round's real number. Rounds a test did not run (``ran`` bit clear in the
+  run's ``OutcomeMatrix``, e.g. the confirmation rounds of a test outside a
+  two-phase run's confirmation set) have no row.
+
+Test ids are dictionary-encoded, so a test name is stored once per file
+instead of once per run record.
+
+Requires ``pyarrow`` (optional dependency, imported on first use).
+
+SQLite database
+---------------
+``SQLiteResultsStore`` keeps the same data in ``runs``, ``tests`` and
+``outcomes`` tables indexed on (project, tool, timestamp) and (test_id, run),
+so questions such as "which runs did this test fail in" or "flaky tests in
+httpie since last week" are answered by an indexed query instead of
+rebuilding DataFrames from the whole results tree.
+"""
+
+import json
+import re
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from outcome_matrix import OutcomeMatrix, TestIndex
+
+
+RUNS_TABLE = 'runs'
+OUTCOMES_TABLE = 'outcomes'
+PARTITION_COLUMNS = ['project', 'tool', 'run_date']
+
+# Round number used for tests reported once per run rather than per round
+DETECTION_ROUND = 0
+
+# Run record fields always produced by FlakyTestAnalyzer._parse_run_results
+BASE_RUN_FIELDS = (
+    'project', 'tool', 'timestamp', 'run_dir', 'error_lines', 'warning_lines',
+    'failed_lines', 'test_results', 'flaky_tests', 'total_tests', 'success_rate'
+)
+# List fields kept out of the runs table (flaky_tests lives in outcomes)
+RUN_LIST_FIELDS = ('flaky_tests', 'test_results')
+
+TIMESTAMP_DATE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})_')
+
+# (project, tool, run_dir, run_data, outcomes)
+LoadedRun = Tuple[str, str, Path, Dict, Optional[OutcomeMatrix]]
+
+
+def _import_pyarrow():
+    """Import pyarrow lazily so the rest of the analyzer works without it."""
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow é necessário para o dataset Parquet: pip install pyarrow"
+        ) from e
+    return pa, ds
+
+
+def run_date(timestamp: str) -> str:
+    """Partition date (YYYY-MM-DD) of a ``%Y-%m-%d_%H-%M-%S`` run timestamp."""
+    match = TIMESTAMP_DATE_PATTERN.match(timestamp or '')
+    return match.group(1) if match else 'unknown'
+
+
+def iter_runs(runs_by_project: Dict[str, Dict[str, List[Tuple]]]) -> Iterator[LoadedRun]:
+    """Flatten the analyzer's project -> tool -> runs mapping, skipping unparsable runs."""
+    for project, tool_runs in runs_by_project.items():
+        for tool, runs in tool_runs.items():
+            for run_dir, run_data, outcomes in runs:
+                if run_data:
+                    yield project, tool, run_dir, run_data, outcomes
+
+
+def build_run_rows(runs_by_project: Dict[str, Dict[str, List[Tuple]]]) -> List[Dict]:
+    """One flat row per run: the run record without its list fields, and its round count."""
+    rows = []
+    for project, tool, _, run_data, outcomes in iter_runs(runs_by_project):
+        row = {k: v for k, v in run_data.items() if k not in RUN_LIST_FIELDS}
+        row.update(project=project, tool=tool, run_date=run_date(run_data['timestamp']),
+                   n_runs=outcomes.n_runs if outcomes is not None else None)
+        rows.append(row)
+    return rows
+
+
+def outcome_rows(outcomes: Optional[OutcomeMatrix]) -> Tuple[List[str], List[int], List[bool]]:
+    """
+    (test_id, round, failed) rows of a run's outcome matrix, test by test.
+
+    Rounds are numbered from 1; cells the test did not run have no row.
+    """
+    if not outcomes:
+        return [], [], []
+    tests, rows = np.nonzero(outcomes.ran_mask().T)
+    names = np.array(outcomes.tests.names, dtype=object)
+    return names[tests].tolist(), (rows + 1).tolist(), outcomes.to_dense()[rows, tests].tolist()
+
+
+def outcome_matrix(test_ids: List[str], rounds: List[int], failed: List[bool],
+                   n_runs: Optional[int] = None) -> OutcomeMatrix:
+    """
+    Outcome matrix of one run from its (test_id, round, failed) rows.
+
+    The matrix has ``n_runs`` rows (by default, one per round up to the last
+    one stored); a test without a row for some round did not run it. With
+    no rows at all it has no columns, as for a run in which nothing failed.
+    """
+    codes, names = pd.factorize(pd.Series(test_ids, dtype=object))
+    rounds = np.asarray(rounds, dtype=np.int64) - 1
+    stored_rounds = int(rounds.max()) + 1 if len(rounds) else 0
+    dense = np.zeros((max(n_runs or 0, stored_rounds), len(names)), dtype=bool)
+    ran = np.zeros_like(dense)
+    dense[rounds, codes] = np.asarray(failed, dtype=bool)
+    ran[rounds, codes] = True
+    return OutcomeMatrix.from_dense(dense, TestIndex(str(name) for name in names), ran)
+
+
+def build_outcome_columns(runs_by_project: Dict[str, Dict[str, List[Tuple]]]) -> Dict[str, list]:
+    """Columnar (test, round) outcomes of every run."""
+    columns = {name: [] for name in ('project', 'tool', 'run_date', 'timestamp',
+                                     'test_id', 'round', 'failed')}
+
+    def extend(project, tool, date, timestamp, test_ids, rounds, failed):
+        columns['project'].extend([project] * len(test_ids))
+        columns['tool'].extend([tool] * len(test_ids))
+        columns['run_date'].extend([date] * len(test_ids))
+        columns['timestamp'].extend([timestamp] * len(test_ids))
+        columns['test_id'].extend(test_ids)
+        columns['round'].extend(rounds)
+        columns['failed'].extend(failed)
+
+    for project, tool, _, run_data, outcomes in iter_runs(runs_by_project):
+        timestamp = run_data['timestamp']
+        date = run_date(timestamp)
+        detected = run_data.get('flaky_tests') or []
+        extend(project, tool, date, timestamp, detected, [DETECTION_ROUND] * len(detected), [True] * len(detected))
+        extend(project, tool, date, timestamp, *outcome_rows(outcomes))
+
+    return columns
+
+
+def write_parquet_dataset(runs_by_project: Dict[str, Dict[str, List[Tuple]]],
+                          dataset_dir: Path) -> None:
+    """
+    Write the runs and outcomes tables as a partitioned Parquet dataset.
+
+    Partitions present in this export replace the matching ones on disk;
+    other partitions (e.g. runs since removed from ``results/``) are kept.
+    """
+    pa, ds = _import_pyarrow()
+    dataset_dir = Path(dataset_dir)
+
+    # from_pylist takes its columns from the first row: give every row the
+    # union of the record fields (metadata differs between tools)
+    run_rows = build_run_rows(runs_by_project)
+    fields = list(dict.fromkeys(k for row in run_rows for k in row))
+    runs_table = pa.Table.from_pylist([{k: row.get(k) for k in fields} for row in run_rows])
+
+    outcome_schema = pa.schema([
+        ('project', pa.string()),
+        ('tool', pa.string()),
+        ('run_date', pa.string()),
+        ('timestamp', pa.string()),
+        ('test_id', pa.dictionary(pa.int32(), pa.string())),
+        ('round', pa.int16()),
+        ('failed', pa.bool_())
+    ])
+    outcomes_table = pa.Table.from_pydict(build_outcome_columns(runs_by_project), schema=outcome_schema)
+
+    for name, table in ((RUNS_TABLE, runs_table), (OUTCOMES_TABLE, outcomes_table)):
+        if table.num_rows == 0:
+            continue
+        ds.write_dataset(
+            table,
+            dataset_dir / name,
+            format='parquet',
+            partitioning=PARTITION_COLUMNS,
+            partitioning_flavor='hive',
+            existing_data_behavior='delete_matching',
+            basename_template='part-{i}.parquet'
+        )
+
+
+def read_parquet_dataset(dataset_dir: Path) -> List[LoadedRun]:
+    """
+    Load the runs written by ``write_parquet_dataset``.
+
+    Returns:
+        List of (project, tool, run_dir, run_data, outcomes), with
+        ``run_data`` shaped like the records of ``FlakyTestAnalyzer.data``
+        and ``outcomes`` an OutcomeMatrix (None for runs without per-round rows)
+    """
+    pa, ds = _import_pyarrow()
+    dataset_dir = Path(dataset_dir)
+
+    runs_path = dataset_dir / RUNS_TABLE
+    if not runs_path.exists():
+        return []
+    runs_dataset = ds.dataset(runs_path, format='parquet', partitioning='hive')
+    # Exports from different days may carry different metadata columns
+    schema = pa.unify_schemas([runs_dataset.schema] + [
+        fragment.physical_schema for fragment in runs_dataset.get_fragments()
+    ])
+    run_rows = ds.dataset(runs_path, schema=schema, format='parquet',
+                          partitioning='hive').to_table().to_pylist()
+
+    # (project, tool, timestamp) -> (flaky tests, (test_id, round, failed) rows)
+    outcomes = {}
+    outcomes_path = dataset_dir / OUTCOMES_TABLE
+    if outcomes_path.exists():
+        table = ds.dataset(outcomes_path, format='parquet', partitioning='hive').to_table(
+            columns=['project', 'tool', 'timestamp', 'test_id', 'round', 'failed']
+        )
+        df = table.to_pandas()
+        for (project, tool, timestamp), group in df.groupby(['project', 'tool', 'timestamp'],
+                                                             sort=False, observed=True):
+            detected = group[group['round'] == DETECTION_ROUND]
+            per_round = group[group['round'] != DETECTION_ROUND]
+            outcomes[(str(project), str(tool), str(timestamp))] = (
+                [str(t) for t in detected['test_id']],
+                (per_round['test_id'].astype(str).tolist(), per_round['round'].tolist(),
+                 per_round['failed'].tolist())
+            )
+
+    loaded = []
+    for row in run_rows:
+        flaky_tests, per_round = outcomes.get(
+            (str(row['project']), str(row['tool']), row['timestamp']), ([], ([], [], []))
+        )
+        loaded.append(_restore_run(row, flaky_tests, per_round))
+
+    return loaded
+
+
+def _restore_run(row: Dict, flaky_tests: List[str], per_round: Tuple[List[str], List[int], List[bool]]
+                 ) -> LoadedRun:
+    """
+    Rebuild an analyzer run record and its outcome matrix from a stored ``runs`` row.
+
+    ``n_runs`` gives the matrix its rounds even without outcome rows (a run
+    in which no test failed); rows stored before it existed fall back to
+    the rounds of the outcome rows, and to no matrix without any.
+    """
+    project, tool = str(row.pop('project')), str(row.pop('tool'))
+    row.pop('run_date', None)
+    n_runs = row.pop('n_runs', None)
+    outcomes = None
+    if per_round[0] or n_runs is not None:
+        outcomes = outcome_matrix(*per_round, n_runs=n_runs)
+    # Fields missing from this run's record come back as nulls
+    run_data = {k: v for k, v in row.items() if v is not None or k in BASE_RUN_FIELDS}
+    run_data.update(project=project, tool=tool, test_results=[], flaky_tests=flaky_tests)
+    return project, tool, Path(run_data['run_dir']), run_data, outcomes
+
+
+class SQLiteResultsStore:
+    """
+    SQLite backend for runs, tests and per-round outcomes.
+
+    Outcomes use the same round convention as the Parquet dataset: round 0
+    for tests a tool reported for the whole run, rounds 1..N for ``runs.csv``,
+    with no row for a round a test did not run.
+    """
+
+    # Run record fields stored as columns; everything else goes to ``metadata``
+    RUN_COLUMNS = ('project', 'tool', 'timestamp', 'run_date', 'run_dir', 'error_lines',
+                   'warning_lines', 'failed_lines', 'total_tests', 'total_flaky', 'success_rate', 'n_runs')
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY,
+            project TEXT NOT NULL,
+            tool TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            run_date TEXT NOT NULL,
+            run_dir TEXT,
+            error_lines INTEGER,
+            warning_lines INTEGER,
+            failed_lines INTEGER,
+            total_tests INTEGER,
+            total_flaky INTEGER,
+            success_rate REAL,
+            n_runs INTEGER,
+            metadata TEXT,
+            UNIQUE (project, tool, timestamp)
+        );
+        CREATE TABLE IF NOT EXISTS tests (
+            id INTEGER PRIMARY KEY,
+            project TEXT NOT NULL,
+            name TEXT NOT NULL,
+            UNIQUE (project, name)
+        );
+        CREATE TABLE IF NOT EXISTS outcomes (
+            test_id INTEGER NOT NULL REFERENCES tests (id),
+            run INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+            round INTEGER NOT NULL,
+            failed INTEGER NOT NULL,
+            PRIMARY KEY (test_id, run, round)
+        );
+        CREATE INDEX IF NOT EXISTS idx_runs_project_tool_timestamp ON runs (project, tool, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_runs_date ON runs (run_date);
+        CREATE INDEX IF NOT EXISTS idx_tests_name ON tests (name);
+        CREATE INDEX IF NOT EXISTS idx_outcomes_test_run ON outcomes (test_id, run);
+        CREATE INDEX IF NOT EXISTS idx_outcomes_run ON outcomes (run);
+    '''
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.executescript(self.SCHEMA)
+        # Databases written before n_runs existed (rounds of a run without outcome rows)
+        if 'n_runs' not in {column for _, column, *_ in self.conn.execute('PRAGMA table_info(runs)')}:
+            self.conn.execute('ALTER TABLE runs ADD COLUMN n_runs INTEGER')
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> 'SQLiteResultsStore':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, runs_by_project: Dict[str, Dict[str, List[Tuple]]]) -> None:
+        """Insert or replace every run (and its outcomes) in one transaction."""
+        test_ids = {
+            (project, name): test_id
+            for test_id, project, name in self.conn.execute('SELECT id, project, name FROM tests')
+        }
+
+        def test_id_for(project: str, name: str) -> int:
+            key = (project, name)
+            if key not in test_ids:
+                cursor = self.conn.execute('INSERT INTO tests (project, name) VALUES (?, ?)', key)
+                test_ids[key] = cursor.lastrowid
+            return test_ids[key]
+
+        placeholders = ', '.join('?' for _ in self.RUN_COLUMNS)
+        with self.conn:
+            for project, tool, _, run_data, outcomes in iter_runs(runs_by_project):
+                timestamp = run_data['timestamp']
+                self.conn.execute('DELETE FROM runs WHERE project = ? AND tool = ? AND timestamp = ?',
+                                  (project, tool, timestamp))
+
+                row = dict(run_data, project=project, tool=tool, run_date=run_date(timestamp),
+                           n_runs=outcomes.n_runs if outcomes is not None else None)
+                metadata = {k: v for k, v in run_data.items()
+                            if k not in self.RUN_COLUMNS and k not in RUN_LIST_FIELDS}
+                cursor = self.conn.execute(
+                    f'INSERT INTO runs ({", ".join(self.RUN_COLUMNS)}, metadata) VALUES ({placeholders}, ?)',
+                    [row.get(column) for column in self.RUN_COLUMNS] + [json.dumps(metadata, ensure_ascii=False)]
+                )
+                run_id = cursor.lastrowid
+
+                rows = [
+                    (test_id_for(project, name), run_id, DETECTION_ROUND, 1)
+                    for name in run_data.get('flaky_tests') or []
+                ]
+                rows.extend(
+                    (test_id_for(project, name), run_id, round_no, int(failed))
+                    for name, round_no, failed in zip(*outcome_rows(outcomes))
+                )
+                self.conn.executemany(
+                    'INSERT INTO outcomes (test_id, run, round, failed) VALUES (?, ?, ?, ?)', rows
+                )
+
+    def read(self) -> List[LoadedRun]:
+        """
+        Load every stored run.
+
+        Returns:
+            List of (project, tool, run_dir, run_data, outcomes), as
+            ``read_parquet_dataset``
+        """
+        columns = ('id',) + self.RUN_COLUMNS + ('metadata',)
+        runs = self.conn.execute(f'SELECT {", ".join(columns)} FROM runs ORDER BY id').fetchall()
+
+        # run id -> (flaky tests, ([test], [round], [failed])); rowid keeps insertion order
+        outcomes = {}
+        query = '''
+            SELECT o.run, t.name, o.round, o.failed
+            FROM outcomes o JOIN tests t ON t.id = o.test_id
+            ORDER BY o.rowid
+        '''
+        for run_id, name, round_no, failed in self.conn.execute(query):
+            flaky_tests, per_round = outcomes.setdefault(run_id, ([], ([], [], [])))
+            if round_no == DETECTION_ROUND:
+                flaky_tests.append(name)
+            else:
+                for column, value in zip(per_round, (name, round_no, bool(failed))):
+                    column.append(value)
+
+        loaded = []
+        for values in runs:
+            row = dict(zip(columns, values))
+            run_id = row.pop('id')
+            row.update(json.loads(row.pop('metadata') or '{}'))
+            flaky_tests, per_round = outcomes.get(run_id, ([], ([], [], [])))
+            loaded.append(_restore_run(row, flaky_tests, per_round))
+        return loaded
+
+    def runs_with_failures(self, test_name: str, project: Optional[str] = None) -> pd.DataFrame:
+        """Runs in which a test failed (or was reported flaky), oldest first."""
+        query = '''
+            SELECT r.project, r.tool, r.timestamp,
+                   SUM(o.failed) AS failures,
+                   SUM(o.round > 0) AS rounds
+            FROM tests t
+            JOIN outcomes o ON o.test_id = t.id
+            JOIN runs r ON r.id = o.run
+            WHERE t.name = ?
+        '''
+        params = [test_name]
+        if project:
+            query += ' AND t.project = ?'
+            params.append(project)
+        query += ' GROUP BY r.id HAVING failures > 0 ORDER BY r.timestamp'
+        return pd.read_sql_query(query, self.conn, params=params)
+
+    def flaky_tests(self, project: Optional[str] = None, tool: Optional[str] = None,
+                    since: Optional[str] = None, until: Optional[str] = None) -> pd.DataFrame:
+        """
+        Tests that were reported flaky, or failed in some but not all rounds.
+
+        Args:
+            project: Restrict to one project
+            tool: Restrict to one tool
+            since: First run date to include (YYYY-MM-DD)
+            until: Last run date to include (YYYY-MM-DD)
+        """
+        where, params = self._run_filters(project, tool, since, until)
+        query = f'''
+            SELECT t.project, r.tool, t.name AS test,
+                   SUM(o.round = 0) AS detections,
+                   SUM(CASE WHEN o.round > 0 THEN o.failed ELSE 0 END) AS failures,
+                   SUM(o.round > 0) AS rounds,
+                   MIN(r.timestamp) AS first_seen,
+                   MAX(r.timestamp) AS last_seen
+            FROM runs r
+            JOIN outcomes o ON o.run = r.id
+            JOIN tests t ON t.id = o.test_id
+            {where}
+            GROUP BY t.id, r.tool
+            HAVING detections > 0 OR (failures > 0 AND failures < rounds)
+            ORDER BY detections DESC, failures DESC, t.name
+        '''
+        return pd.read_sql_query(query, self.conn, params=params)
+
+    def top_flaky_tests(self, project: Optional[str] = None, tool: Optional[str] = None,
+                        since: Optional[str] = None, until: Optional[str] = None,
+                        limit: int = 20) -> pd.Series:
+        """
+        Tests reported flaky in the most runs, like ``value_counts()`` over ``flaky_tests``.
+
+        Returns:
+            Series of occurrence counts indexed by test name
+        """
+        where, params = self._run_filters(project, tool, since, until)
+        where += (' AND ' if where else 'WHERE ') + f'o.round = {DETECTION_ROUND}'
+        query = f'''
+            SELECT t.name AS test, COUNT(*) AS occurrences
+            FROM runs r
+            JOIN outcomes o ON o.run = r.id
+            JOIN tests t ON t.id = o.test_id
+            {where}
+            GROUP BY t.name
+            ORDER BY occurrences DESC, t.name
+            LIMIT ?
+        '''
+        df = pd.read_sql_query(query, self.conn, params=params + [limit])
+        return df.set_index('test')['occurrences']
+
+    @staticmethod
+    def _run_filters(project: Optional[str], tool: Optional[str],
+                     since: Optional[str], until: Optional[str]) -> Tuple[str, list]:
+        """WHERE clause over ``runs r`` for the common project/tool/date filters."""
+        clauses, params = [], []
+        for clause, value in (('r.project = ?', project), ('r.tool = ?', tool),
+                              ('r.run_date >= ?', since), ('r.run_date <= ?', until)):
+            if value:
+                clauses.append(clause)
+                params.append(str(value))
+        return ('WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+
+if __name__ == "__main__":
+    # Round-trip check: outcomes with rounds a test did not run (as in
+    # two-phase / JSONL runs), and a run in which nothing failed, must come
+    # back unchanged from both stores
+    import tempfile
+
+    record = {'project': 'demo', 'tool': 'pytest-rerun', 'timestamp': '2025-12-10_13-32-25',
+              'run_dir': 'results/demo/pytest-rerun/2025-12-10_13-32-25', 'error_lines': 0,
+              'warning_lines': 0, 'failed_lines': 0, 'test_results': [],
+              'flaky_tests': ['tests/test_a.py::test_flaky'], 'total_tests': 3, 'success_rate': 0.0}
+    # Columns: test_ok (not run in rounds 4-6), test_flaky (not run in round 3), test_fail
+    failed = np.array([[0, 0, 1], [0, 1, 1], [0, 0, 1], [0, 0, 1], [0, 1, 1], [0, 0, 1]], dtype=bool)
+    ran = np.array([[1, 1, 1], [1, 1, 1], [1, 0, 1], [0, 1, 1], [0, 1, 1], [0, 1, 1]], dtype=bool)
+    names = ['tests/test_a.py::test_ok', 'tests/test_a.py::test_flaky', 'tests/test_a.py::test_fail']
+    partial = OutcomeMatrix.from_dense(failed, TestIndex(names), ran)
+    clean_record = dict(record, timestamp='2025-12-10_14-00-00', flaky_tests=[],
+                        run_dir='results/demo/pytest-rerun/2025-12-10_14-00-00')
+    clean = OutcomeMatrix.from_dense(np.zeros((4, 0), dtype=bool), TestIndex())
+    runs = {'demo': {'pytest-rerun': [(Path(record['run_dir']), record, partial),
+                                      (Path(clean_record['run_dir']), clean_record, clean)]}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with SQLiteResultsStore(Path(tmp) / 'results.db') as store:
+            store.write(runs)
+            loaded = {'sqlite': store.read()}
+        try:
+            write_parquet_dataset(runs, Path(tmp) / 'dataset')
+            loaded['parquet'] = read_parquet_dataset(Path(tmp) / 'dataset')
+        except ImportError as e:
+            print(f"Parquet skipped: {e}")
+
+    for backend, runs_read in loaded.items():
+        by_timestamp = {run_data['timestamp']: (run_data, outcomes) for _, _, _, run_data, outcomes in runs_read}
+        run_data, outcomes = by_timestamp[record['timestamp']]
+        assert outcomes.tests.names == names, (backend, outcomes.tests.names)
+        assert (outcomes.to_dense() == failed).all() and (outcomes.ran_mask() == ran).all(), backend
+        assert run_data['flaky_tests'] == record['flaky_tests'], (backend, run_data)
+        _, outcomes = by_timestamp[clean_record['timestamp']]
+        assert outcomes is not None and outcomes.shape == (4, 0), (backend, outcomes)
+        print(f"{backend}: outcomes with not-run rounds round-trip OK")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Prefix-sum index of run records by day.
+
+The dashboard filters runs by a date range on every interaction. Instead of
+rescanning the run records, ``TimeIndex`` keeps, for every (project, tool)
+series and for every reported flaky test, the cumulative per-day sums of
+the counts the dashboard shows. Row ``i`` of a cumulative array holds the
+total of all days before day ``i``, so the total over any range of days is
+one subtraction per series, however long the history is.
+"""
+
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+TIMESTAMP_FORMAT = '%Y-%m-%d_%H-%M-%S'
+
+
+class DailyCounts:
+    """
+    Cumulative per-day sums of one measure for many series.
+
+    ``cumulative`` has one row per calendar day from ``start`` plus a leading
+    row of zeros, and one column per series (``columns``).
+    """
+
+    def __init__(self, start: Optional[date], cumulative: np.ndarray, columns: pd.Index):
+        self.start = start
+        self.cumulative = cumulative
+        self.columns = columns
+
+    @classmethod
+    def from_events(cls, days: pd.Series, series: pd.Series, values: Iterable[float],
+                    start: Optional[date], n_days: int, columns: pd.Index) -> 'DailyCounts':
+        """
+        Index ``values`` observed on ``days`` for the given series.
+
+        Args:
+            days: Day of each event (``datetime.date``)
+            series: Column label of each event (a value of ``columns``)
+            values: Amount each event adds to its day and series
+            start: First day of the index
+            n_days: Number of calendar days covered
+            columns: Labels of the series
+        """
+        daily = np.zeros((n_days + 1, len(columns)))
+        if len(columns):
+            rows = np.array([(day - start).days + 1 for day in days], dtype=np.int64)
+            np.add.at(daily, (rows, columns.get_indexer(series)), np.asarray(list(values), dtype=float))
+        return cls(start, np.cumsum(daily, axis=0), columns)
+
+    @property
+    def n_days(self) -> int:
+        return len(self.cumulative) - 1
+
+    def _bounds(self, start: Optional[date], end: Optional[date]):
+        """Prefix-sum rows delimiting the days ``start``..``end`` (inclusive), clipped to the index."""
+        if self.start is None:
+            return 0, 0
+        first = 0 if start is None else int(np.clip((start - self.start).days, 0, self.n_days))
+        last = self.n_days if end is None else int(np.clip((end - self.start).days + 1, 0, self.n_days))
+        return first, max(first, last)
+
+    def range_sum(self, start: Optional[date] = None, end: Optional[date] = None,
+                  mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Total of each series over the days ``start``..``end`` (inclusive)."""
+        first, last = self._bounds(start, end)
+        totals = self.cumulative[last] - self.cumulative[first]
+        return totals if mask is None else totals[mask]
+
+    def daily(self, start: Optional[date] = None, end: Optional[date] = None,
+              mask: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Per-day values of each series over ``start``..``end`` (days × series)."""
+        first, last = self._bounds(start, end)
+        block = self.cumulative[first:last + 1]
+        columns = self.columns
+        if mask is not None:
+            block, columns = block[:, mask], columns[mask]
+        index = pd.date_range(self.start, periods=self.n_days)[first:last] if self.start else pd.DatetimeIndex([])
+        return pd.DataFrame(np.diff(block, axis=0), index=index, columns=columns)
+
+
+class TimeIndex:
+    """
+    Per-day prefix sums of the run records of every project and tool.
+
+    Measures: ``runs`` (number of runs), ``total_flaky`` and ``error_lines``
+    per (project, tool); ``tests`` counts the runs that reported each flaky
+    test, per (project, tool, test).
+    """
+
+    MEASURES = ('runs', 'total_flaky', 'error_lines')
+
+    def __init__(self, measures: Dict[str, DailyCounts], tests: DailyCounts):
+        self.measures = measures
+        self.tests = tests
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> 'TimeIndex':
+        """Index run records (as in ``FlakyTestAnalyzer.data``); runs without a valid timestamp are left out."""
+        runs = pd.DataFrame(records, columns=['project', 'tool', 'timestamp', 'total_flaky',
+                                              'error_lines', 'flaky_tests'])
+        runs['day'] = pd.to_datetime(runs['timestamp'], format=TIMESTAMP_FORMAT, errors='coerce').dt.date
+        runs = runs[runs['day'].notna()]
+
+        start = runs['day'].min() if not runs.empty else None
+        n_days = (runs['day'].max() - start).days + 1 if start is not None else 0
+
+        series = pd.Series(list(zip(runs['project'], runs['tool'])), index=runs.index, dtype=object)
+        columns = pd.MultiIndex.from_tuples(sorted(set(series)), names=['project', 'tool']) \
+            if len(series) else pd.MultiIndex.from_tuples([], names=['project', 'tool'])
+        values = {
+            'runs': np.ones(len(runs)),
+            'total_flaky': pd.to_numeric(runs['total_flaky'], errors='coerce').fillna(0),
+            'error_lines': pd.to_numeric(runs['error_lines'], errors='coerce').fillna(0)
+        }
+        measures = {
+            name: DailyCounts.from_events(runs['day'], series, values[name], start, n_days, columns)
+            for name in cls.MEASURES
+        }
+
+        detections = [
+            (day, (project, tool, test))
+            for day, project, tool, tests in zip(runs['day'], runs['project'], runs['tool'], runs['flaky_tests'])
+            if isinstance(tests, list)
+            for test in dict.fromkeys(tests)
+        ]
+        test_series = pd.Series([key for _, key in detections], dtype=object)
+        test_columns = pd.MultiIndex.from_tuples(list(dict.fromkeys(test_series)),
+                                                 names=['project', 'tool', 'test']) \
+            if detections else pd.MultiIndex.from_tuples([], names=['project', 'tool', 'test'])
+        tests = DailyCounts.from_events([day for day, _ in detections], test_series,
+                                        np.ones(len(detections)), start, n_days, test_columns)
+        return cls(measures, tests)
+
+    @staticmethod
+    def _select(columns: pd.MultiIndex, projects: Optional[List[str]], tools: Optional[List[str]]) -> np.ndarray:
+        mask = np.ones(len(columns), dtype=bool)
+        if projects is not None:
+            mask &= columns.get_level_values('project').isin(projects)
+        if tools is not None:
+            mask &= columns.get_level_values('tool').isin(tools)
+        return mask
+
+    def totals(self, start: Optional[date] = None, end: Optional[date] = None,
+               projects: Optional[List[str]] = None, tools: Optional[List[str]] = None) -> pd.DataFrame:
+        """Sum of every measure per (project, tool) over the days ``start``..``end``."""
+        columns = self.measures['runs'].columns
+        mask = self._select(columns, projects, tools)
+        totals = pd.DataFrame(
+            {name: counts.range_sum(start, end, mask) for name, counts in self.measures.items()},
+            index=columns[mask]
+        )
+        return totals[totals['runs'] > 0]
+
+    def timeline(self, start: Optional[date] = None, end: Optional[date] = None,
+                 projects: Optional[List[str]] = None, tools: Optional[List[str]] = None,
+                 measure: str = 'total_flaky') -> pd.DataFrame:
+        """Per-day ``measure`` by project (days × projects), keeping only days with runs."""
+        counts = self.measures[measure]
+        mask = self._select(counts.columns, projects, tools)
+        runs = self.measures['runs'].daily(start, end, mask)
+        values = counts.daily(start, end, mask)
+        by_project = values.T.groupby(level='project').sum().T
+        return by_project[runs.sum(axis=1) > 0]
+
+    def top_tests(self, start: Optional[date] = None, end: Optional[date] = None,
+                  projects: Optional[List[str]] = None, tools: Optional[List[str]] = None,
+                  limit: int = 20) -> pd.Series:
+        """Most frequently reported flaky tests over the days ``start``..``end``."""
+        mask = self._select(self.tests.columns, projects, tools)
+        counts = pd.Series(self.tests.range_sum(start, end, mask),
+                           index=self.tests.columns[mask].get_level_values('test'))
+        counts = counts.groupby(level=0, sort=False).sum()
+        counts = counts[counts > 0].astype('int64')
+        return counts.sort_values(ascending=False, kind='stable').head(limit).rename('count')